@@ -1,8 +1,10 @@
 import sys
+import asyncio
+import threading
+import time
 from urllib.parse import urlparse
 from itertools import groupby
 
-import questionary
 import argparse
 from rich.console import Console
 from rich.table import Table
@@ -13,8 +15,11 @@ from rich import box
 from rich.align import Align
 from rich.text import Text
 
+from src.config import cfg
 from src.database import GameCache
+from src.func.search import dedupe_results, DEFAULT_SEARCH_PAGES
 from src.scraper import PSScraper
+from src.refresher import RefreshScheduler, DEFAULT_REFRESH_RATE
 
 console = Console()
 
@@ -22,7 +27,50 @@ class PKGScraperCLI:
     def __init__(self):
         self.db = GameCache()
         self.scraper = PSScraper()
-        self.db.load()
+        self.scraper.start_proxy_revalidation()
+        # The prompt comes up while the cache and search index finish loading.
+        threading.Thread(target=self.db.load, name="cache-load", daemon=True).start()
+        self.refresher = RefreshScheduler(cfg.database.get("refresh_rate", DEFAULT_REFRESH_RATE))
+        self.refresher.start(self._refresh_details)
+
+    def search(self, query):
+        if self.scraper.search_mode == "local_first":
+            results = self.db.search_local(query)
+            if results:
+                return results
+
+        # Cached per result page, under the same keys the API uses.
+        results = []
+        for number in range(1, cfg.scraper.get("search_pages", DEFAULT_SEARCH_PAGES) + 1):
+            found, last = self._search_page(query, number)
+            if not found:
+                break
+            results.extend(found)
+            if last is not None and number >= last:
+                break
+        return dedupe_results(results)
+
+    def _search_page(self, query, page):
+        cached = self.db.get_search(query, page)
+        if cached:
+            results, stale, last = cached
+            if stale:
+                threading.Thread(target=self._refresh_search, args=(query, page), daemon=True).start()
+            return results, last
+        return self._refresh_search(query, page)
+
+    def _refresh_search(self, query, page=1):
+        results, last = self.scraper.search_page(query, page)
+        # An empty page past the known end is cached too, so paging stops there next time.
+        if results or (last is not None and last < page):
+            self.db.save_search(query, results, page, last)
+        return results, last
+
+    def _refresh_details(self, url, game):
+        links, metadata = self.scraper.get_game_links(url, game.get("size", "N/A"))
+        if links:
+            self.db.save(dict(game, url=url), links, metadata)
+        return bool(links)
 
     def get_host_name(self, url):
         try:
@@ -44,19 +92,29 @@ class PKGScraperCLI:
         cached_data = self.db.get(game["url"])
 
         if cached_data:
-            if getattr(self.db, "redis_client", None):
+            if self.db.is_stale(cached_data):
+                self.refresher.submit(game["url"], dict(game))
+            if self.db.storage.name == "redis":
                 console.print(" [bold green]✓[/bold green] [italic]Loaded from Redis Cloud[/italic]")
             else:
                 console.print(" [bold green]✓[/bold green] [italic]Loaded from local cache[/italic]")
             
             links = cached_data["links"]
             metadata = cached_data.get("metadata", {"size": cached_data.get("size", "N/A")})
+        elif negative := self.db.get_negative(game["url"]):
+            wait = max(0, int(negative["until"] - time.time()))
+            console.print(f" [bold red]×[/bold red] [italic]Failed recently ({negative['failure']}); not retrying for {wait}s[/italic]")
+            links, metadata = [], {"size": game.get("size", "N/A")}
         else:
             with console.status("[bold yellow]Scraping live data...[/bold yellow]", spinner="dots"):
                 links, metadata = self.scraper.get_game_links(game["url"], game["size"])
                 if links:
                     game["size"] = metadata.get("size", "N/A")
                     self.db.save(game, links, metadata)
+                elif not metadata.get("aborted"):
+                    self.db.save_negative(game["url"], metadata.get("failure", "no_links"))
+            if metadata.get("aborted"):
+                console.print(" [bold yellow]![/bold yellow] [italic]Upstream busy or too slow; try again shortly[/italic]")
 
         grid = Table.grid(expand=True, padding=(0, 2))
         grid.add_column(style="bold white")
@@ -134,6 +192,8 @@ class PKGScraperCLI:
         console.print("\n" + "[dim]━[/dim]" * 50 + "\n")
 
     def run(self):
+        import questionary
+
         title_text = Text("PS PKG Scraper v1.2", style="bold white")
         subtitle = Text("Interactive Search & Scrape Tool", style="dim")
         
@@ -159,7 +219,7 @@ class PKGScraperCLI:
                     continue
 
                 with console.status(f"[bold blue]Searching for '{query}'...[/bold blue]", spinner="earth"):
-                    games = self.scraper.search_games(query)
+                    games = self.search(query)
 
                 if not games:
                     console.print("[bold red]! No games found. Try a different keyword.[/bold red]")
@@ -174,6 +234,8 @@ class PKGScraperCLI:
                 console.print(f"[bold red]ERROR:[/bold red] {e}")
 
     def handle_selection(self, games):
+        import questionary
+
         while True:
             choices = [f"{i+1}. {g['title']}" for i, g in enumerate(games)]
             choices.append(questionary.Separator())
@@ -205,13 +267,36 @@ class PKGScraperCLI:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="PS PKG Scraper CLI")
     parser.add_argument("-s", "--search", type=str, help="Immediately search for a game")
+    parser.add_argument("--crawl", action="store_true", help="Crawl listing pages and pre-warm the cache")
+    parser.add_argument("--max-pages", type=int, default=0, help="Stop the crawl after this many listing pages (0 = all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent game pages while crawling")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the crawl checkpoint and start over")
     args = parser.parse_args()
 
+    if args.crawl:
+        from src.async_scraper import AsyncPSScraper
+        from src.crawler import Crawler
+
+        async def crawl():
+            db = GameCache()
+            db.load()
+            scraper = AsyncPSScraper()
+            crawler = Crawler(scraper, db, concurrency=args.concurrency, max_pages=args.max_pages)
+            try:
+                return await crawler.run(fresh=args.fresh)
+            finally:
+                await scraper.close()
+
+        console.print("[bold blue]Crawling catalog...[/bold blue]")
+        stats = asyncio.run(crawl())
+        console.print(f"[bold green]Crawl finished:[/bold green] {stats}")
+        sys.exit(0)
+
     app = PKGScraperCLI()
 
     if args.search:
         console.print(f"[bold blue]Searching for '{args.search}'...[/bold blue]")
-        games = app.scraper.search_games(args.search)
+        games = app.search(args.search)
         if games:
             app.handle_selection(games)
         else:
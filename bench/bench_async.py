@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream
+from src.scraper import PSScraper
+from src.async_scraper import AsyncPSScraper
+
+# Starlette's default threadpool size, i.e. the ceiling sync endpoints run into.
+THREADPOOL_SIZE = 40
+
+
+def bench_sync(urls, workers):
+    scraper = PSScraper()
+    scraper.budget = None
+    # Both modes scrape the same URLs; stored pages would turn the second into 304s.
+    scraper.pages = None
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda u: scraper.get_game_links(u)[0], urls))
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(1 for links in results if links)
+
+
+async def bench_async(urls):
+    scraper = AsyncPSScraper()
+    scraper.budget = None
+    scraper.pages = None
+    started = time.perf_counter()
+    results = await asyncio.gather(*(scraper.get_game_links(u) for u in urls))
+    elapsed = time.perf_counter() - started
+    await scraper.close()
+    return elapsed, sum(1 for links, _ in results if links)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async PSScraper concurrency benchmark")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub upstream latency per request (s)")
+    parser.add_argument("--levels", type=str, default="1,10,50,100,200", help="Concurrency levels")
+    args = parser.parse_args()
+
+    rows = []
+    with StubUpstream(latency=args.latency) as stub:
+        for level in (int(x) for x in args.levels.split(",")):
+            urls = [f"{stub.base_url}game-{i}/" for i in range(level)]
+
+            sync_elapsed, sync_ok = bench_sync(urls, min(level, THREADPOOL_SIZE))
+            async_elapsed, async_ok = asyncio.run(bench_async(urls))
+
+            rows.append({
+                "concurrency": level,
+                "sync_seconds": round(sync_elapsed, 3),
+                "sync_rps": round(level / sync_elapsed, 1),
+                "sync_ok": sync_ok,
+                "async_seconds": round(async_elapsed, 3),
+                "async_rps": round(level / async_elapsed, 1),
+                "async_ok": async_ok,
+            })
+
+    print(json.dumps({"benchmark": "async_scraper", "latency": args.latency, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
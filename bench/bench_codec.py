@@ -0,0 +1,87 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream
+from src.codec import EntryCodec, HAS_ZSTD
+from src.scraper import PSScraper
+
+
+def sample_entries(stub):
+    scraper = PSScraper()
+    scraper.budget = None
+    links, metadata = scraper.get_game_links(f"{stub.base_url}sample-game/")
+    base = {
+        "url": f"{stub.base_url}sample-game/", "title": "Sample Game", "size": metadata["size"],
+        "downloads": "N/A", "image": None, "links": links, "metadata": metadata, "timestamp": time.time(),
+    }
+    # Big releases list several versions/updates, each with its own mirror set.
+    large_links = [
+        dict(link, group=f"CUSA18569 – USA | v1.{i:02d}", url=f"{link['url']}?part={i}")
+        for i in range(8) for link in links
+    ]
+    return {"fixture": base, "large": dict(base, links=large_links)}
+
+
+def bench_format(name, encode, decode, entry, iterations):
+    encoded = encode(entry)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        encode(entry)
+    encode_us = (time.perf_counter() - started) / iterations * 1e6
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(encoded)
+    decode_us = (time.perf_counter() - started) / iterations * 1e6
+
+    return {
+        "format": name,
+        "bytes": len(encoded),
+        "encode_us": round(encode_us, 2),
+        "decode_us": round(decode_us, 2),
+        "roundtrip": decode(encoded) == entry,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache entry size and encode/decode cost per format")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    formats = [
+        ("json_indent", lambda e: json.dumps(e, indent=4), json.loads),
+        ("json", EntryCodec("json").dumps, EntryCodec("json").loads),
+        ("msgpack", EntryCodec("msgpack").dumps, EntryCodec("msgpack").loads),
+    ]
+    if HAS_ZSTD:
+        zstd = EntryCodec("msgpack", "zstd")
+        formats.append(("msgpack_zstd", zstd.dumps, zstd.loads))
+
+    with contextlib.redirect_stdout(sys.stderr), StubUpstream() as stub:
+        entries = sample_entries(stub)
+
+    rows = []
+    for entry_name, entry in entries.items():
+        baseline = None
+        for name, encode, decode in formats:
+            row = bench_format(name, encode, decode, entry, args.iterations)
+            row["entry"] = entry_name
+            if name == "json":
+                baseline = row
+            rows.append(row)
+        for row in rows:
+            if row["entry"] == entry_name and baseline:
+                row["size_vs_json"] = round(row["bytes"] / baseline["bytes"], 3)
+                row["decode_vs_json"] = round(row["decode_us"] / baseline["decode_us"], 3)
+
+    print(json.dumps({"benchmark": "cache_codec", "zstd": HAS_ZSTD, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
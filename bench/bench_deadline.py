@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream
+from src.async_scraper import AsyncPSScraper
+from src.deadline import DeadlineExceeded, deadline
+
+
+async def expire(stub, request_deadline, settle):
+    # One request whose deadline runs out mid-scrape (the DL page is still to come),
+    # then one joined by a second caller with a longer deadline.
+    from src.database import GameCache
+    from src.service import ScrapeService
+
+    scraper = AsyncPSScraper()
+    scraper.budget = None
+    scraper.pages = None
+    db = GameCache("json")
+    service = ScrapeService(scraper, db)
+
+    async def details(url, seconds):
+        started = time.perf_counter()
+        try:
+            with deadline(seconds):
+                links, _ = await service.get_details(url)
+            return {"links": len(links), "seconds": round(time.perf_counter() - started, 3)}
+        except DeadlineExceeded:
+            return {"deadline_exceeded": True, "seconds": round(time.perf_counter() - started, 3)}
+
+    try:
+        alone = f"{stub.base_url}deadline-alone/"
+        row = {"alone": await details(alone, request_deadline)}
+        at_expiry = stub.requests
+        await asyncio.sleep(settle)
+        row["alone"]["upstream_after_expiry"] = stub.requests - at_expiry
+        row["alone"]["cached"] = db.peek(alone)
+
+        joined = f"{stub.base_url}deadline-joined/"
+        short, long = await asyncio.gather(details(joined, request_deadline), details(joined, request_deadline * 4))
+        row["joined"] = {"short": short, "long": long, "cached": db.peek(joined)}
+    finally:
+        await scraper.close()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that a request past its deadline stops fetching upstream")
+    parser.add_argument("--latency", type=float, default=0.7, help="stub latency per request (s)")
+    parser.add_argument("--deadline", type=float, default=1.0, help="request deadline (s)")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to watch upstream after the deadline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir, contextlib.redirect_stdout(sys.stderr), \
+            StubUpstream(latency=args.latency) as stub:
+        os.environ["SCRAPER_BASE_URL"] = stub.base_url
+        previous = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            row = asyncio.run(expire(stub, args.deadline, args.settle))
+        finally:
+            os.chdir(previous)
+
+    alone, joined = row["alone"], row["joined"]
+    row["ok"] = (
+        alone.get("deadline_exceeded", False) and not alone["upstream_after_expiry"] and not alone["cached"]
+        and joined["short"].get("deadline_exceeded", False) and joined["long"].get("links", 0) > 0 and joined["cached"]
+    )
+    print(json.dumps({"benchmark": "deadline", "results": [row]}, indent=2))
+    sys.exit(0 if row["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger, log_stats
+
+MODES = {
+    "inline": {"queue": False, "repeat_burst": 0},
+    "queue": {"queue": True, "repeat_burst": 0},
+    "queue+repeat": {"queue": True},
+}
+
+
+def storm(logger, messages):
+    # A proxy-failure storm: one call site with a changing proxy in the text.
+    timings = []
+    for i in range(messages):
+        started = time.perf_counter()
+        logger.warning(f"Proxy http://10.0.0.{i % 250}:8080 cooling down for 30s. {i % 7}/8 available.")
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure(mode, fmt, messages, tmpdir):
+    settings = dict(MODES[mode], format=fmt, file=os.path.join(tmpdir, f"{mode}-{fmt}.log"))
+    logger = setup_logger(f"bench_{mode}_{fmt}", "INFO", settings)
+    logger.propagate = False
+    started = time.perf_counter()
+    timings = storm(logger, messages)
+    for handler in logger.handlers:
+        if hasattr(handler, "queue"):
+            handler.queue.join()
+    total = time.perf_counter() - started
+    timings.sort()
+    return {
+        "mode": mode,
+        "format": fmt,
+        "messages": messages,
+        "caller_us_per_msg": round(sum(timings) / len(timings) * 1e6, 2),
+        "p99_us": round(timings[int(len(timings) * 0.99)] * 1e6, 2),
+        "until_written_ms": round(total * 1000, 1),
+        "suppressed": log_stats(logger.name)["suppressed"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caller-side cost of logging: inline handlers vs. queue + listener")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--formats", default="rich,json")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmpdir, open(os.devnull, "w") as devnull:
+        # Console output goes to /dev/null; the queue is drained before moving on.
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            for fmt in args.formats.split(","):
+                for mode in MODES:
+                    rows.append(measure(mode, fmt, args.messages, tmpdir))
+
+    print(json.dumps({"benchmark": "logging", "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from bench.stub_upstream import StubUpstream
+from src.func.extract_link import extract_grouped_links
+from src.func.extract_page import extract_page
+from src.func.parse import parse_metadata
+from src.func.search import parse_search_results
+from src.func.soup import HAS_LXML, make_soup
+from src.scraper import DEFAULT_IGNORE_DOMAINS
+
+
+def new_metadata():
+    return {
+        "size": "N/A", "version": "N/A", "region": "N/A", "password": "N/A",
+        "firmware": "N/A", "voice": "N/A", "subtitles": "N/A", "cusa": "N/A",
+    }
+
+
+def legacy_page(content):
+    soup = BeautifulSoup(content, "html.parser")
+    metadata = parse_metadata(soup, new_metadata())
+    return metadata, extract_grouped_links(soup, DEFAULT_IGNORE_DOMAINS)
+
+
+def single_pass_page(content, parser):
+    return extract_page(make_soup(content, parser), new_metadata(), DEFAULT_IGNORE_DOMAINS)
+
+
+def legacy_search(content):
+    soup = BeautifulSoup(content, "html.parser")
+    results = []
+    for item in soup.select("article.item"):
+        title_node = item.select_one(".penci-entry-title a")
+        if not title_node:
+            continue
+        img_node = item.select_one(".thumbnail")
+        results.append({
+            "title": title_node.get_text(strip=True),
+            "url": title_node["href"],
+            "image": img_node.get("data-bgset") if img_node else None,
+            "downloads": "N/A",
+            "size": "N/A",
+        })
+    return results
+
+
+def timed(fn, content, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = fn(content)
+    return (time.perf_counter() - started) / iterations, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser backend / single-pass extractor benchmark")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    stub = StubUpstream()
+    pages = {
+        "search": (stub.render("/", {"s": ["elden ring"]})[1], legacy_search, parse_search_results),
+        "game": (stub.render("/elden-ring-ps4/", {})[1], legacy_page, single_pass_page),
+        "dl": (stub.render("/dll-elden-ring-ps4/", {})[1], legacy_page, single_pass_page),
+    }
+    backends = ["html.parser"] + (["lxml"] if HAS_LXML else [])
+
+    rows = []
+    for name, (html, legacy_fn, new_fn) in pages.items():
+        content = html.encode("utf-8")
+        base_time, expected = timed(legacy_fn, content, args.iterations)
+        for backend in backends:
+            new_time, result = timed(lambda c: new_fn(c, backend), content, args.iterations)
+            rows.append({
+                "page": name,
+                "parser": backend,
+                "legacy_ms": round(base_time * 1000, 3),
+                "new_ms": round(new_time * 1000, 3),
+                "speedup": round(base_time / new_time, 2),
+                "identical": result == expected,
+            })
+
+    print(json.dumps({"benchmark": "parse", "iterations": args.iterations, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream
+from src.func.pages import parse_game_page, parse_dl_page
+from src.func.search import parse_search_results
+from src.func.soup import resolve_parser
+from src.parse_pool import ParsePool
+from src.scraper import DEFAULT_IGNORE_DOMAINS, new_metadata
+
+
+def jobs(parser):
+    stub = StubUpstream()
+    game = stub.render("/elden-ring-ps4/", {})[1].encode("utf-8")
+    dl = stub.render("/dll-elden-ring-ps4/", {})[1].encode("utf-8")
+    search = stub.render("/", {"s": ["elden ring"]})[1].encode("utf-8")
+    # One details request parses a game page and a DL page; one search parses a listing.
+    return [
+        (parse_game_page, game, new_metadata(), parser, DEFAULT_IGNORE_DOMAINS),
+        (parse_dl_page, dl, new_metadata(), parser, DEFAULT_IGNORE_DOMAINS),
+        (parse_search_results, search, parser),
+    ]
+
+
+async def run_batch(pool, batch):
+    if pool is None:
+        # Inline parsing, as in the default configuration: one core, blocking the loop.
+        # The extractors fill in the metadata dict, so each job gets its own copy, as
+        # a worker gets an unpickled one.
+        return [fn(*copy.deepcopy(args)) for fn, *args in batch]
+    return await asyncio.gather(*(pool.run(fn, *args) for fn, *args in batch))
+
+
+async def measure(workers, batch, queue, expected):
+    pool = ParsePool(workers, queue) if workers else None
+    try:
+        await run_batch(pool, batch[:workers * 2 or 1])  # start the workers outside the timing
+        started = time.perf_counter()
+        results = await run_batch(pool, batch)
+        elapsed = time.perf_counter() - started
+    finally:
+        if pool is not None:
+            pool.close()
+    assert results == expected, f"{workers} workers: output differs from the inline parse"
+    return {
+        "workers": workers,
+        "pages": len(batch),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(batch) / elapsed, 1),
+        "waited": pool.stats["waited"] if pool else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse throughput inline vs. ParsePool worker processes")
+    parser.add_argument("--pages", type=int, default=600)
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts (default: 0,1,2,4..cpu_count)")
+    parser.add_argument("--queue", type=int, default=None, help="ParsePool max_pending (default: 4 per worker)")
+    parser.add_argument("--parser", default="auto")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        counts, n = [0, 1], 2
+        while n <= cpus:
+            counts.append(n)
+            n *= 2
+        if counts[-1] != cpus:
+            counts.append(cpus)
+
+    kinds = jobs(resolve_parser(args.parser))
+    batch = [kinds[i % len(kinds)] for i in range(args.pages)]
+
+    expected = asyncio.run(run_batch(None, batch))
+    rows = [asyncio.run(measure(workers, batch, args.queue, expected)) for workers in counts]
+    inline = rows[0]["pages_per_sec"] if rows and rows[0]["workers"] == 0 else None
+    for row in rows:
+        if inline:
+            row["speedup"] = round(row["pages_per_sec"] / inline, 2)
+
+    print(json.dumps({"benchmark": "parse_pool", "cpus": cpus, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
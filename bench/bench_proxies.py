@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream, StubProxy
+from src.async_scraper import AsyncPSScraper
+from src.metrics import proxy_label
+from src.proxy_pool import ProxyPool
+from src.scraper import PSScraper
+
+# Scoring, cool-down, re-validation, warm-route preference and direct_fallback=False
+# against local stub proxies. Each scenario reports ``ok``; the script exits non-zero
+# if one fails.
+
+
+def new_scraper(proxies, direct_fallback=True, **pool_args):
+    scraper = PSScraper()
+    scraper.budget = None
+    scraper.pages = None
+    scraper.max_hedges = 0
+    scraper.direct_fallback = direct_fallback
+    scraper.proxy_pool = ProxyPool([p.url for p in proxies], **pool_args)
+    return scraper
+
+
+def scrape(scraper, stub, names):
+    ok = 0
+    for name in names:
+        links, _ = scraper.get_game_links(f"{stub.base_url}{name}/")
+        ok += bool(links)
+    return ok
+
+
+def direct(stub, proxies):
+    # The stub proxies forward from the same host, so whatever reached the
+    # upstream without going through one of them went out directly.
+    return stub.requests - sum(p.forwarded for p in proxies)
+
+
+def failover(stub, requests):
+    bad, good = StubProxy(failing=True).start(), StubProxy().start()
+    try:
+        random.seed(1)
+        scraper = new_scraper([bad, good], cooldown=60)
+        # The proxy that breaks had the better record, so it is the one picked first.
+        for _ in range(5):
+            scraper.proxy_pool.report_success(bad.url, 0.01)
+        ok = scrape(scraper, stub, [f"failover-{i}" for i in range(requests)])
+        states = {s["url"]: s for s in scraper.proxy_pool.snapshot()}
+        return {
+            "scenario": "failover",
+            "scraped": ok,
+            "bad_proxy_requests": bad.requests,
+            "direct": direct(stub, [bad, good]),
+            "bad_cooling": states[proxy_label(bad.url)]["cooling"],
+            "ok": ok == requests and bad.requests == 1 and direct(stub, [bad, good]) == 0 and states[proxy_label(bad.url)]["cooling"],
+        }
+    finally:
+        bad.stop()
+        good.stop()
+
+
+def cooldown(stub, requests, seconds):
+    # Without re-validation an expired cool-down lets the next request act as the probe;
+    # until then requests fall back to the direct connection.
+    flaky = StubProxy(failing=True).start()
+    try:
+        scraper = new_scraper([flaky], cooldown=seconds)
+        before = direct(stub, [flaky])
+        first = scrape(scraper, stub, [f"cooldown-a{i}" for i in range(requests)])
+        during = flaky.requests
+        flaky.failing = False
+        time.sleep(seconds * 1.5)
+        after = scrape(scraper, stub, [f"cooldown-b{i}" for i in range(requests)])
+        return {
+            "scenario": "cooldown",
+            "scraped": first + after,
+            "flaky_requests_while_cooling": during,
+            "direct_while_cooling": direct(stub, [flaky]) - before,
+            "flaky_forwarded_after": flaky.forwarded,
+            "ok": first + after == 2 * requests and during == 1 and flaky.forwarded == 2 * requests,
+        }
+    finally:
+        flaky.stop()
+
+
+def revalidation(stub, requests, interval):
+    # With the re-validator running, a failed proxy stays out after its cool-down
+    # until a probe through it passes.
+    from curl_cffi import requests as curl
+
+    flaky, good = StubProxy(failing=True).start(), StubProxy().start()
+    try:
+        scraper = new_scraper([flaky, good], cooldown=interval / 4)
+
+        def probe(proxy_url):
+            curl.get(stub.base_url, timeout=5, impersonate="chrome",
+                     proxies={"http": proxy_url, "https": proxy_url}).raise_for_status()
+
+        scraper.proxy_pool.start_revalidation(probe, interval)
+        scrape(scraper, stub, [f"revalidate-a{i}" for i in range(requests)])
+        time.sleep(interval * 2.5)
+        served_while_failing = flaky.requests - flaky.refused
+        flaky.failing = False
+        time.sleep(interval * 2.5)
+        ok = scrape(scraper, stub, [f"revalidate-b{i}" for i in range(requests)])
+        scraper.proxy_pool.stop()
+        return {
+            "scenario": "revalidation",
+            "scraped": ok,
+            "probes_refused": flaky.refused - 1,
+            "flaky_forwarded_after": flaky.forwarded,
+            "ok": ok == requests and flaky.refused > 1 and not served_while_failing and flaky.forwarded > 1,
+        }
+    finally:
+        flaky.stop()
+        good.stop()
+
+
+def warm_preference(stub, draws, bonus):
+    # Two proxies with the same score; the one the scraper already has a session on
+    # should win about bonus / (bonus + 1) of the picks.
+    proxies = [StubProxy().start() for _ in range(2)]
+    try:
+        scraper = new_scraper(proxies[:1])
+        scrape(scraper, stub, ["warm-0"])
+        warm = scraper.sessions.warm()
+        shares = {}
+        for warm_bonus in (1.0, bonus):
+            random.seed(1)
+            pool = ProxyPool([p.url for p in proxies], warm_bonus=warm_bonus)
+            for p in proxies:
+                pool.report_success(p.url, 0.05)
+            picks = [pool.acquire(prefer=warm) for _ in range(draws)]
+            shares[warm_bonus] = picks.count(proxies[0].url) / draws
+        return {
+            "scenario": "warm_preference",
+            "warm_routes": len(warm),
+            "warm_share_no_bonus": round(shares[1.0], 3),
+            "warm_share_bonus": round(shares[bonus], 3),
+            "ok": warm == {proxies[0].url} and shares[bonus] > 0.8 and 0.4 < shares[1.0] < 0.6,
+        }
+    finally:
+        for p in proxies:
+            p.stop()
+
+
+async def no_direct_async(stub, names, dead):
+    scraper = AsyncPSScraper()
+    scraper.budget = None
+    scraper.pages = None
+    scraper.direct_fallback = False
+    scraper.proxy_pool = ProxyPool([dead.url], cooldown=60)
+    try:
+        return sum([bool((await scraper.get_game_links(f"{stub.base_url}{name}/"))[0]) for name in names])
+    finally:
+        await scraper.close()
+
+
+def no_direct(stub, requests):
+    # direct_fallback=False: not the first failure, nor later calls while the only
+    # proxy is cooling down, may go out on the local IP.
+    dead = StubProxy(failing=True).start()
+    try:
+        before = stub.requests
+        sync_ok = scrape(new_scraper([dead], direct_fallback=False, cooldown=60), stub, [f"nodirect-s{i}" for i in range(requests)])
+        async_ok = asyncio.run(no_direct_async(stub, [f"nodirect-a{i}" for i in range(requests)], dead))
+        leaked = stub.requests - before
+        return {
+            "scenario": "direct_fallback_off",
+            "scraped": sync_ok + async_ok,
+            "proxy_requests": dead.requests,
+            "direct": leaked,
+            "ok": leaked == 0 and sync_ok == 0 and async_ok == 0,
+        }
+    finally:
+        dead.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy pool failover, cool-down, re-validation and direct_fallback against stub proxies")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--cooldown", type=float, default=0.5)
+    parser.add_argument("--interval", type=float, default=0.4, help="re-validation interval (s)")
+    parser.add_argument("--warm-bonus", type=float, default=10.0)
+    parser.add_argument("--draws", type=int, default=2000, help="proxy picks for the warm-route share")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr), StubUpstream() as stub:
+        os.environ["SCRAPER_BASE_URL"] = stub.base_url
+        rows = [
+            failover(stub, args.requests),
+            cooldown(stub, args.requests, args.cooldown),
+            revalidation(stub, args.requests, args.interval),
+            warm_preference(stub, args.draws, args.warm_bonus),
+            no_direct(stub, args.requests),
+        ]
+
+    print(json.dumps({"benchmark": "proxies", "results": rows}, indent=2))
+    sys.exit(0 if all(row["ok"] for row in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream
+from src.async_scraper import AsyncPSScraper
+from src.page_store import PageStore
+
+
+async def refresh(urls, concurrency, store_path):
+    # One cold pass fills the store; the timed pass re-scrapes the same, unchanged pages.
+    scraper = AsyncPSScraper()
+    scraper.budget = None
+    scraper.pages = PageStore(store_path) if store_path else None
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        async with limit:
+            links, _ = await scraper.get_game_links(url)
+            return bool(links)
+
+    try:
+        await asyncio.gather(*(one(url) for url in urls))
+        before = dict(scraper.pages.stats) if scraper.pages is not None else {}
+        started = time.perf_counter()
+        ok = await asyncio.gather(*(one(url) for url in urls))
+        elapsed = time.perf_counter() - started
+    finally:
+        await scraper.close()
+
+    row = {
+        "page_store": bool(store_path),
+        "pages": len(urls),
+        "failed": ok.count(False),
+        "refresh_ms_per_game": round(elapsed / len(urls) * 1000, 2),
+    }
+    if scraper.pages is not None:
+        row.update({k: v - before.get(k, 0) for k, v in scraper.pages.stats.items()})
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scraping unchanged game pages with and without the page store")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmpdir, contextlib.redirect_stdout(sys.stderr), \
+            StubUpstream(latency=args.latency) as stub:
+        os.environ["SCRAPER_BASE_URL"] = stub.base_url
+        urls = [f"{stub.base_url}game-{i}/" for i in range(args.pages)]
+        for store_path in (None, os.path.join(tmpdir, "pages.db")):
+            rows.append(asyncio.run(refresh(urls, args.concurrency, store_path)))
+
+    print(json.dumps({"benchmark": "revalidate", "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
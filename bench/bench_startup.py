@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.stub_upstream import StubUpstream
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def median_ms(samples):
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def import_time(module, runs):
+    """Import time inside the process, and wall time of the whole interpreter run."""
+    imports, totals = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        totals.append(time.perf_counter() - started)
+        imports.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"module": module, "import_ms": median_ms(imports), "process_ms": median_ms(totals)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url, timeout=30):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return resp.status, resp.read()
+
+
+def wait_ready(url, proc, deadline):
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited with {proc.returncode} before answering")
+        with contextlib.suppress(OSError):
+            if get(url, timeout=1)[0] == 200:
+                return
+        time.sleep(0.005)
+    raise TimeoutError(f"API did not answer {url} in time")
+
+
+def first_response(run, env, timeout, delay):
+    """Spawn uvicorn and time the first /health answer, then the first /search that
+    has to go upstream (loads the HTTP client and parser on demand)."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(f"{base}/health", proc, started + timeout)
+        health = time.perf_counter() - started
+        time.sleep(delay)
+        # A fresh query per run so the search cache left by earlier runs is not hit.
+        query = urllib.parse.quote(f"startup {os.getpid()} {run}")
+        search_started = time.perf_counter()
+        get(f"{base}/search?q={query}", timeout=timeout)
+        search = time.perf_counter() - search_started
+    finally:
+        proc.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            proc.wait(timeout=10)
+        if proc.poll() is None:
+            proc.kill()
+    return health, search
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start: module import time and API time-to-first-response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", default="src.api,app", help="comma-separated modules to import")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--delay", type=float, default=0.0, help="idle seconds between the first /health and /search")
+    parser.add_argument("--skip-server", action="store_true", help="only measure import time")
+    args = parser.parse_args()
+
+    result = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "imports": [import_time(m, args.runs) for m in args.modules.split(",") if m],
+    }
+
+    if not args.skip_server:
+        with contextlib.redirect_stdout(sys.stderr), StubUpstream() as stub:
+            env = dict(os.environ, SCRAPER_BASE_URL=stub.base_url)
+            samples = [first_response(run, env, args.timeout, args.delay) for run in range(args.runs)]
+        result["server"] = {
+            "first_health_ms": median_ms([h for h, _ in samples]),
+            "first_search_ms": median_ms([s for _, s in samples]),
+            "delay_s": args.delay,
+        }
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
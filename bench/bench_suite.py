@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.stub_upstream import StubUpstream
+
+# Each scenario runs in its own scratch directory under a temp root, so the
+# relative cache/index paths from the default config never touch the checkout
+# and a local config/settings.json cannot skew the numbers (the suite writes
+# its own there).
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples, elapsed, errors=0):
+    return {
+        "ops": len(samples),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(samples) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3) if samples else None,
+        "p99_ms": round(percentile(samples, 99) * 1000, 3) if samples else None,
+    }
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_search(stub, iterations):
+    from src.scraper import PSScraper
+
+    scraper = PSScraper()
+    samples, errors = [], 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        elapsed, results = timed(scraper.search_games, f"game {i}")
+        samples.append(elapsed)
+        errors += not results
+    return summarize(samples, time.perf_counter() - started, errors)
+
+
+def bench_game_links(stub, iterations):
+    from src.scraper import PSScraper
+
+    scraper = PSScraper()
+    samples, errors = [], 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        elapsed, (links, _) = timed(scraper.get_game_links, f"{stub.base_url}game-{i}/")
+        samples.append(elapsed)
+        errors += not links
+    return summarize(samples, time.perf_counter() - started, errors)
+
+
+def sample_entry(stub):
+    from src.scraper import PSScraper
+
+    links, metadata = PSScraper().get_game_links(f"{stub.base_url}sample-game/")
+    return links, metadata
+
+
+def bench_cache(backend, size, links, metadata, saves=50, lookups=1000):
+    from src.database import GameCache
+
+    workdir = tempfile.mkdtemp(prefix=f"cache-{backend}-{size}-")
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        seed = GameCache(backend)
+        seed.index = None
+        seed.load()
+        now = time.time()
+        for i in range(size):
+            url = f"https://example.invalid/game-{i}/"
+            entry = {
+                "url": url, "title": f"Game {i}", "size": metadata.get("size", "N/A"),
+                "downloads": "N/A", "image": None, "links": links, "metadata": metadata, "timestamp": now,
+            }
+            if backend == "json":
+                seed.storage._data[url] = entry
+            else:
+                seed.storage.put(url, entry, 31536000)
+        if backend == "json":
+            # One bulk write instead of a rewrite per entry.
+            os.makedirs(os.path.dirname(seed.storage.path) or ".", exist_ok=True)
+            with open(seed.storage.path, "w", encoding="utf-8") as f:
+                json.dump(seed.storage._data, f, indent=4)
+
+        cold_load, _ = timed(lambda: GameCache(backend).load())
+        cache = GameCache(backend)
+        warm_load, _ = timed(cache.load)
+
+        keys = [f"https://example.invalid/game-{i % size}/" for i in range(min(lookups, size))]
+        get_samples = [timed(cache.get, key)[0] for key in keys]
+        get_elapsed = sum(get_samples)
+
+        save_samples = []
+        for i in range(saves):
+            game = {"url": f"https://example.invalid/new-{i}/", "title": f"New {i}"}
+            save_samples.append(timed(cache.save, game, links, metadata)[0])
+
+        return {
+            "size": size,
+            "load_cold_ms": round(cold_load * 1000, 3),
+            "load_warm_ms": round(warm_load * 1000, 3),
+            "get": summarize(get_samples, get_elapsed),
+            "save": summarize(save_samples, sum(save_samples)),
+        }
+    finally:
+        os.chdir(previous)
+
+
+async def bench_api(stub, requests, concurrency):
+    import httpx
+    from src.api import app, limiter
+
+    limiter.enabled = False
+    results = {}
+
+    async def drive(client, paths):
+        limit = asyncio.Semaphore(concurrency)
+        samples, errors = [], 0
+
+        async def one(path):
+            nonlocal errors
+            async with limit:
+                started = time.perf_counter()
+                resp = await client.get(path)
+                samples.append(time.perf_counter() - started)
+                errors += resp.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in paths))
+        return summarize(samples, time.perf_counter() - started, errors)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            detail_paths = [f"/details?url={stub.base_url}api-game-{i}/" for i in range(requests)]
+            results["details_cold"] = await drive(client, detail_paths)
+            results["details_warm"] = await drive(client, detail_paths)
+            results["search"] = await drive(client, [f"/search?q=query+{i % 20}" for i in range(requests)])
+    return results
+
+
+def compare(baseline, current):
+    def change(old, new):
+        if not old or new is None:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    def walk(old, new, path=""):
+        out = {}
+        for key, value in new.items():
+            if key not in old:
+                continue
+            name = f"{path}.{key}" if path else key
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                out.update(walk(old[key], value, name))
+            elif isinstance(value, list) and isinstance(old[key], list):
+                by_size = {row.get("size"): row for row in old[key] if isinstance(row, dict)}
+                for row in value:
+                    if isinstance(row, dict) and row.get("size") in by_size:
+                        out.update(walk(by_size[row["size"]], row, f"{name}[{row['size']}]"))
+            elif key in ("throughput", "p50_ms", "p99_ms") or key.endswith("_ms"):
+                out[name] = {"baseline": old[key], "current": value, "change_pct": change(old[key], value)}
+        return out
+
+    return {
+        "baseline": baseline.get("meta", {}).get("revision"),
+        "current": current.get("meta", {}).get("revision"),
+        "changes": walk(baseline.get("results", {}), current.get("results", {})),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PS PKG Scraper benchmark suite against a local stub upstream")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub upstream latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests answered with 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of upstream connections dropped")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for injected latency/failures")
+    parser.add_argument("--iterations", type=int, default=100, help="Sequential search/detail calls")
+    parser.add_argument("--cache-sizes", type=str, default="100,1000,5000", help="GameCache sizes to load/save")
+    parser.add_argument("--backends", type=str, default="sqlite,json", help="GameCache backends to benchmark")
+    parser.add_argument("--api-requests", type=int, default=200, help="Requests per API scenario")
+    parser.add_argument("--api-concurrency", type=int, default=50, help="Concurrent API clients")
+    parser.add_argument("--only", type=str, default="", help="Comma-separated subset: search,details,cache,api")
+    parser.add_argument("--out", type=str, help="Write results JSON to this file as well as stdout")
+    parser.add_argument("--compare", type=str, help="Baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    only = set(filter(None, args.only.split(",")))
+    selected = lambda name: not only or name in only
+
+    out_path = os.path.abspath(args.out) if args.out else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    scratch = tempfile.mkdtemp(prefix="ps-bench-")
+    os.chdir(scratch)
+    # The outbound budget protects the real upstream; against the stub it would only
+    # measure the configured rate.
+    os.makedirs("config")
+    with open(os.path.join("config", "settings.json"), "w", encoding="utf-8") as f:
+        json.dump({"scraper": {"upstream_rate": 0}}, f)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+        },
+        "results": {},
+    }
+    results = report["results"]
+
+    # Keep stdout for the JSON report: scraper logs and cache prints go to stderr,
+    # and INFO chatter is muted so console rendering is not part of the timings.
+    logging.getLogger("ps_scraper").setLevel(logging.WARNING)
+    with contextlib.redirect_stdout(sys.stderr), StubUpstream(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      drop_rate=args.drop_rate, seed=args.seed) as stub:
+        os.environ["SCRAPER_BASE_URL"] = stub.base_url
+
+        if selected("search"):
+            results["search_games"] = bench_search(stub, args.iterations)
+        if selected("details"):
+            results["get_game_links"] = bench_game_links(stub, args.iterations)
+        if selected("cache"):
+            links, metadata = sample_entry(stub)
+            sizes = [int(x) for x in args.cache_sizes.split(",") if x]
+            for backend in filter(None, args.backends.split(",")):
+                results[f"cache_{backend}"] = [bench_cache(backend, size, links, metadata) for size in sizes]
+        if selected("api"):
+            results["api"] = asyncio.run(bench_api(stub, args.api_requests, args.api_concurrency))
+
+        report["meta"]["upstream"] = {"requests": stub.requests, "errors": stub.errors, "drops": stub.drops}
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(json.load(f), report)
+
+    output = json.dumps(report, indent=2)
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
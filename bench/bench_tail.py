@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_upstream import StubUpstream
+from src.async_scraper import AsyncPSScraper
+from src.deadline import DeadlineExceeded, deadline
+from src.scraper import LATENCY_MIN_SAMPLES
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def measure(stub, hedging, requests, concurrency, request_deadline):
+    scraper = AsyncPSScraper()
+    scraper.budget = None
+    if not hedging:
+        scraper.max_hedges = 0
+    limit = asyncio.Semaphore(concurrency)
+    timings, failed = [], 0
+
+    async def one(i):
+        nonlocal failed
+        async with limit:
+            started = time.perf_counter()
+            try:
+                with deadline(request_deadline):
+                    links, _ = await scraper.get_game_links(f"{stub.base_url}tail-{hedging}-{i}/")
+                if not links:
+                    failed += 1
+            except DeadlineExceeded:
+                failed += 1
+            timings.append(time.perf_counter() - started)
+
+    try:
+        # Fill the latency window first, so timeouts and hedges run on observed numbers.
+        await asyncio.gather(*(one(-1 - i) for i in range(LATENCY_MIN_SAMPLES)))
+        timings.clear()
+        failed = 0
+        before = stub.requests
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        upstream = stub.requests - before
+    finally:
+        await scraper.close()
+
+    return {
+        "hedging": hedging,
+        "requests": requests,
+        "failed": failed,
+        "upstream_requests": upstream,
+        "p50_ms": round(percentile(timings, 0.5) * 1000, 1),
+        "p90_ms": round(percentile(timings, 0.9) * 1000, 1),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 1),
+        "max_ms": round(max(timings) * 1000, 1),
+        "hedge_delay_ms": round((scraper.hedge_delay() or 0) * 1000, 1),
+        "attempt_timeout_s": round(scraper.adaptive_timeout(), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail latency of get_game_links with and without hedged requests")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="fraction of upstream requests that stall")
+    parser.add_argument("--tail-latency", type=float, default=1.0, help="extra seconds a stalled request takes")
+    parser.add_argument("--deadline", type=float, default=None, help="per-call deadline in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = []
+    with contextlib.redirect_stdout(sys.stderr), StubUpstream(
+        latency=args.latency, jitter=args.jitter, tail_rate=args.tail_rate, tail_latency=args.tail_latency, seed=args.seed
+    ) as stub:
+        os.environ["SCRAPER_BASE_URL"] = stub.base_url
+        for hedging in (False, True):
+            rows.append(asyncio.run(measure(stub, hedging, args.requests, args.concurrency, args.deadline)))
+
+    print(json.dumps({"benchmark": "tail", "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import asyncio
+import hashlib
+import os
+import random
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+TRICKLE_CHUNKS = 8
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class StubUpstream:
+    """Minimal asyncio HTTP server that mimics the superpsx.com routes used by the scraper.
+
+    ``jitter`` adds up to that many seconds of random delay on top of ``latency``;
+    ``error_rate`` answers that fraction of requests with ``error_status`` and
+    ``drop_rate`` closes the connection without answering. ``seed`` makes the
+    injected faults reproducible. ``trickle`` spreads the body over that many
+    seconds in ``TRICKLE_CHUNKS`` writes, like a slow upstream transfer.
+    ``search_pages`` paginates search results (``/page/N/?s=``); later pages repeat
+    the first result of page 1, like a listing that shifted while being paged.
+    ``tail_rate`` of the requests stall for an extra ``tail_latency`` seconds.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, pages=3, jitter=0.0,
+                 error_rate=0.0, error_status=503, drop_rate=0.0, seed=None, trickle=0.0, search_pages=1,
+                 tail_rate=0.0, tail_latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.pages = pages
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.drop_rate = drop_rate
+        self.trickle = trickle
+        self.search_pages = search_pages
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.drops = 0
+        self._templates = {
+            "search": load_fixture("search.html"),
+            "game": load_fixture("game.html"),
+            "dl": load_fixture("dl.html"),
+            "listing": load_fixture("listing.html"),
+        }
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._writers = set()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def render(self, path, query):
+        slug = path.strip("/")
+        page = 1
+        if path == "/" and "s" in query:
+            name = "search"
+        elif slug.startswith("page/") and "s" in query:
+            name = "search"
+            page = int(slug.split("/")[1])
+            if page > self.search_pages:
+                return 404, "Not Found"
+        elif path == "/" or slug.startswith("page/"):
+            name = "listing"
+            page = int(slug.split("/")[1]) if slug else 1
+            if page > self.pages:
+                return 404, "Not Found"
+        elif slug.startswith("dll-"):
+            name = "dl"
+            slug = slug[4:]
+        elif slug:
+            name = "game"
+        else:
+            return 404, "Not Found"
+
+        body = self._templates[name]
+        body = body.replace("{{BASE}}", self.base_url)
+        body = body.replace("{{SLUG}}", slug)
+        body = body.replace("{{QUERY}}", query.get("s", [""])[0])
+        body = body.replace("{{PAGE}}", str(page))
+        if name == "search" and self.search_pages > 1:
+            body = self._paginate_search(body, page, query.get("s", [""])[0])
+        return 200, body
+
+    def _paginate_search(self, body, page, term):
+        if page > 1:
+            body = body.replace(f"{self.base_url}elden-ring-", f"{self.base_url}p{page}-elden-ring-")
+            body = body.replace(f"{self.base_url}p{page}-elden-ring-ps4/", f"{self.base_url}elden-ring-ps4/")
+        links = "".join(
+            f'<span aria-current="page" class="page-numbers current">{n}</span>' if n == page else
+            f'<a class="page-numbers" href="{self.base_url}page/{n}/?s={term}">{n}</a>'
+            for n in range(1, self.search_pages + 1)
+        )
+        return body.replace("</ul>\n</div>", f'</ul>\n<div class="penci-pagination">{links}</div>\n</div>', 1)
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                self.requests += 1
+                try:
+                    target = request_line.decode("latin-1").split(" ")[1]
+                except IndexError:
+                    break
+                parts = urlsplit(target)
+                status, body = self.render(parts.path, parse_qs(parts.query))
+
+                delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+                if self.tail_rate and self.random.random() < self.tail_rate:
+                    delay += self.tail_latency
+                if delay:
+                    await asyncio.sleep(delay)
+
+                roll = self.random.random()
+                if roll < self.drop_rate:
+                    self.drops += 1
+                    break
+                if roll < self.drop_rate + self.error_rate:
+                    self.errors += 1
+                    status, body = self.error_status, "Injected failure"
+
+                payload = body.encode("utf-8")
+                etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+                if status == 200 and headers.get("if-none-match") == etag:
+                    status, payload = 304, b""
+
+                reason = {200: "OK", 304: "Not Modified", 404: "Not Found"}.get(status, "Error")
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: text/html; charset=UTF-8\r\n"
+                    f"ETag: {etag}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode("latin-1")
+                )
+                if self.trickle and payload:
+                    step = -(-len(payload) // TRICKLE_CHUNKS)
+                    for offset in range(0, len(payload), step):
+                        writer.write(payload[offset:offset + step])
+                        await writer.drain()
+                        await asyncio.sleep(self.trickle / TRICKLE_CHUNKS)
+                else:
+                    writer.write(payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubProxy:
+    """Minimal forward HTTP proxy in front of a StubUpstream (absolute-form requests,
+    no CONNECT). ``failing`` can be flipped at any time: while set, requests are
+    answered with ``fail_status`` (a dead or blocked proxy) instead of forwarded.
+    ``forwarded`` counts the requests that reached the upstream through it."""
+
+    def __init__(self, host="127.0.0.1", port=0, failing=False, fail_status=502, latency=0.0):
+        self.host = host
+        self.port = port
+        self.failing = failing
+        self.fail_status = fail_status
+        self.latency = latency
+        self.requests = 0
+        self.forwarded = 0
+        self.refused = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._writers = set()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def _relay(self, target, request_line, headers):
+        parts = urlsplit(target)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        try:
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            method, _, version = request_line.split(" ", 2)
+            lines = [f"{method} {path} {version.strip()}"]
+            lines += [f"{name}: {value}" for name, value in headers.items() if not name.startswith("proxy-")]
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            await writer.drain()
+
+            head = [await reader.readline()]
+            length = 0
+            while head[-1] not in (b"\r\n", b"\n", b""):
+                name, _, value = head[-1].decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value.strip())
+                head.append(await reader.readline())
+            return b"".join(head) + (await reader.readexactly(length) if length else b"")
+        finally:
+            writer.close()
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.failing:
+                    self.refused += 1
+                    writer.write(
+                        f"HTTP/1.1 {self.fail_status} Proxy Error\r\n"
+                        f"Content-Length: 0\r\nConnection: keep-alive\r\n\r\n".encode("latin-1")
+                    )
+                    await writer.drain()
+                    continue
+
+                request_line = request_line.decode("latin-1")
+                try:
+                    response = await self._relay(request_line.split(" ")[1], request_line, headers)
+                except (IndexError, OSError, asyncio.IncompleteReadError):
+                    break
+                self.forwarded += 1
+                writer.write(response)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,22 +1,62 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import PlainTextResponse, HTMLResponse
+import asyncio
+import json
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, HTMLResponse, StreamingResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from pydantic import BaseModel
 
-from src.scraper import PSScraper
+from src.async_scraper import AsyncPSScraper
+from src.database import GameCache
+from src.service import ScrapeService, DEFAULT_SEARCH_MAX_PAGES
+from src.func.search import DEFAULT_SEARCH_PAGES
+from src.refresher import RefreshScheduler, DEFAULT_REFRESH_RATE
 from src.config import cfg
+from src.metrics import metrics, DEADLINE_EXCEEDED
+from src.rate_budget import BudgetExceeded
+from src.deadline import DeadlineExceeded, deadline, DEFAULT_REQUEST_DEADLINE
+
+@asynccontextmanager
+async def lifespan(app):
+    loading = None
+    if api_cfg.get("defer_cache_load", True):
+        # Storage opens itself on first use, so requests are served while the search
+        # index, invalidation subscription and scraper come up in the background.
+        loading = asyncio.create_task(asyncio.to_thread(warm_up))
+    else:
+        warm_up()
+    scraper.start_proxy_revalidation()
+    service.start_refresher()
+    yield
+    refresher.stop()
+    await scraper.close()
+    if loading is not None:
+        await loading
+
+def warm_up():
+    db.load()
+    scraper.warm_up()
 
-app = FastAPI(title="PS PKG Scraper API")
+app = FastAPI(title="PS PKG Scraper API", lifespan=lifespan)
 
 if cfg.webui:
     app.mount("/static", StaticFiles(directory="static"), name="static")
-    templates = Jinja2Templates(directory="templates")
+    templates = None
     @app.get("/", response_class=HTMLResponse)
     async def home(request: Request):
+        # Jinja2 is only imported once the web UI is actually requested.
+        global templates
+        if templates is None:
+            from fastapi.templating import Jinja2Templates
+            templates = Jinja2Templates(directory="templates")
         return templates.TemplateResponse("index.html", {"request": request})
 else:
     @app.get("/", response_class=PlainTextResponse)
@@ -31,30 +71,134 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-limiter = Limiter(key_func=get_remote_address)
+api_cfg = cfg.api
+
+# Shared storage makes the per-client limits hold across workers and replicas; if
+# Redis drops out, slowapi falls back to per-process memory instead of failing open.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=api_cfg["rate_limit_storage"] or os.getenv("REDIS_URL") or "memory://",
+    key_prefix="ps_ratelimit",
+    in_memory_fallback_enabled=True,
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-scraper = PSScraper()
+@app.exception_handler(BudgetExceeded)
+async def budget_exceeded_handler(request: Request, exc: BudgetExceeded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.wait))},
+    )
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    DEADLINE_EXCEEDED.inc(request.url.path)
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+# Total time one request may spend on upstream fetches, retries and hedges included.
+request_deadline = api_cfg.get("request_deadline", DEFAULT_REQUEST_DEADLINE)
+
+def event_stream(request: Request, events):
+    # NDJSON by default; Server-Sent Events when the client asks for them.
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    def encode(event):
+        data = json.dumps(event)
+        return f"event: {event['type']}\ndata: {data}\n\n" if sse else data + "\n"
+
+    async def body():
+        try:
+            with deadline(request_deadline):
+                async for event in events:
+                    yield encode(event)
+        except BudgetExceeded as e:
+            yield encode({"type": "error", "status": 503, "detail": str(e), "retry_after": math.ceil(e.wait)})
+        except DeadlineExceeded as e:
+            DEADLINE_EXCEEDED.inc(request.url.path)
+            yield encode({"type": "error", "status": 504, "detail": str(e)})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+
+scraper = AsyncPSScraper()
+db = GameCache()
+refresher = RefreshScheduler(cfg.database.get("refresh_rate", DEFAULT_REFRESH_RATE))
+service = ScrapeService(
+    scraper, db,
+    prefetch_top_n=api_cfg["prefetch_top_n"],
+    prefetch_concurrency=api_cfg["prefetch_concurrency"],
+    prefetch_budget=api_cfg["prefetch_budget"],
+    refresher=refresher,
+    search_pages=cfg.scraper.get("search_pages", DEFAULT_SEARCH_PAGES),
+    search_max_pages=api_cfg.get("search_max_pages", DEFAULT_SEARCH_MAX_PAGES),
+)
+metrics.add_collector(service.collect_metrics)
 
 @app.get("/health", response_class=PlainTextResponse)
 def health_check():
     return "OK"
 
+@app.get("/stats")
+def get_stats():
+    return service.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/search")
 @limiter.limit("10/minute")
-def search_games(request: Request, q: str):
+async def search_games(
+    request: Request,
+    q: str,
+    stream: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
     if not q:
         raise HTTPException(status_code=400, detail="Query parameter 'q' is required")
-    results = scraper.search_games(q)
-    return {"count": len(results), "results": results}
+    if stream:
+        return event_stream(request, service.iter_search(q, limit, offset))
+    with deadline(request_deadline):
+        results, next_offset = await service.search(q, limit, offset)
+    return {"count": len(results), "results": results, "offset": offset, "next_offset": next_offset}
 
 @app.get("/details")
 @limiter.limit("10/minute")
-def get_game_details(request: Request, url: str):
+async def get_game_details(request: Request, url: str, stream: bool = False):
     if not url:
         raise HTTPException(status_code=400, detail="Query parameter 'url' is required")
-    links, metadata = scraper.get_game_links(url, "N/A")
-    if not links and metadata.get("size") == "N/A":
+    if stream:
+        return event_stream(request, service.iter_details(url))
+    with deadline(request_deadline):
+        links, metadata = await service.get_details(url)
+    if not links and (metadata.get("size") == "N/A" or "failure" in metadata):
         raise HTTPException(status_code=404, detail="No content found or scraping failed")
-    return {"metadata": metadata, "links": links}
\ No newline at end of file
+    return {"metadata": metadata, "links": links}
+
+@app.post("/details/batch")
+@limiter.limit(api_cfg["batch_rate_limit"])
+async def get_game_details_batch(request: Request, body: BatchRequest):
+    if not body.urls:
+        raise HTTPException(status_code=400, detail="Body field 'urls' must not be empty")
+    if len(body.urls) > api_cfg["batch_max_urls"]:
+        raise HTTPException(status_code=413, detail=f"At most {api_cfg['batch_max_urls']} URLs per batch")
+
+    async def ndjson():
+        async for item in service.iter_details_batch(
+            body.urls,
+            concurrency=api_cfg["batch_concurrency"],
+            per_host=api_cfg["batch_per_host"],
+            item_deadline=request_deadline,
+        ):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
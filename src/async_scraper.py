@@ -0,0 +1,337 @@
+import asyncio
+import json
+import time
+
+from src.logger import log
+from src.scraper import PSScraper, is_proxy_fault, failure_class
+from src.proxy_pool import proxy_dict
+from src.func.search import search_url, parse_search_page, parse_search_results, iter_search_results, last_page
+from src.func.soup import make_soup
+from src.func.sniff import DLAnchorSniffer
+from src.func.pages import parse_game_page, parse_dl_page
+from src.parse_pool import make_parse_pool
+from src.metrics import stage, record_upstream, BUDGET_REJECTED, HEDGED_REQUESTS
+from src.rate_budget import BudgetExceeded
+from src.deadline import DeadlineExceeded, cap
+from src.page_store import Page
+
+DEFAULT_MAX_CLIENTS = 100
+DEFAULT_PREFETCH_DL = True
+
+def _discard(task):
+    if not task.cancelled():
+        task.exception()
+
+class AsyncPSScraper(PSScraper):
+    def __init__(self):
+        super().__init__()
+        self.parse_pool = make_parse_pool(self.scraper_cfg)
+
+    async def _parse(self, fn, *args):
+        if self.parse_pool is None:
+            return fn(*args)
+        return await self.parse_pool.run(fn, *args)
+
+    def _new_session(self, proxy_url):
+        from curl_cffi.requests import AsyncSession
+        max_clients = self.scraper_cfg.get("max_clients", DEFAULT_MAX_CLIENTS)
+        return AsyncSession(max_clients=max_clients, impersonate="chrome", proxies=proxy_dict(proxy_url))
+
+    async def _reserve(self, max_wait):
+        if self.budget.blocking:
+            return await asyncio.to_thread(self.budget.reserve, max_wait)
+        return self.budget.reserve(max_wait)
+
+    async def _spend_budget(self):
+        if self.budget is None:
+            return
+        wait, needed = await self._reserve(cap(self.budget_max_wait))
+        if wait is None:
+            BUDGET_REJECTED.inc()
+            raise BudgetExceeded(needed)
+        if wait:
+            with stage("budget_wait"):
+                await asyncio.sleep(wait)
+
+    async def _stream(self, session, url, timeout, headers, on_chunk):
+        resp = await session.get(url, timeout=timeout, headers=headers, stream=True)
+        chunks = []
+        try:
+            async for chunk in resp.aiter_content():
+                chunks.append(chunk)
+                if resp.status_code < 400:
+                    on_chunk(chunk)
+        finally:
+            await resp.aclose()
+        resp.content = b"".join(chunks)
+        return resp
+
+    async def _get(self, url, proxy_url, headers=None, on_chunk=None):
+        for session in self.sessions.evict_idle():
+            await session.close()
+        limit = self.adaptive_timeout()
+        timeout = cap(limit)
+        started = time.perf_counter()
+        with self.sessions.use(proxy_url) as session:
+            try:
+                if on_chunk is None:
+                    resp = await session.get(url, timeout=timeout, headers=headers)
+                else:
+                    # curl only enforces a low-speed limit on streamed transfers (1s
+                    # granularity), so the total is bounded here.
+                    resp = await asyncio.wait_for(self._stream(session, url, timeout, headers, on_chunk), timeout)
+            except Exception as e:
+                record_upstream("error", proxy_url is not None)
+                self._observe(started, limit, timeout, e)
+                raise
+        self._observe(started, limit, timeout)
+        self.sessions.record(proxy_url, resp)
+        record_upstream(resp.status_code, proxy_url is not None)
+        resp.raise_for_status()
+        return resp
+
+    async def _attempt(self, url, proxy_url, label, headers, on_chunk):
+        if proxy_url is None:
+            return await self._get(url, None, headers, on_chunk)
+        log.debug(f"{label} Proxy: {proxy_url}")
+        started = time.perf_counter()
+        try:
+            resp = await self._get(url, proxy_url, headers, on_chunk)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if is_proxy_fault(e):
+                self.proxy_pool.report_failure(proxy_url)
+            else:
+                self.proxy_pool.report_success(proxy_url, time.perf_counter() - started)
+            raise
+        self.proxy_pool.report_success(proxy_url, time.perf_counter() - started)
+        return resp
+
+    async def _fetch(self, url, label, headers=None, on_chunk=None):
+        """Up to proxy_retries + 1 proxies, then the direct connection. An attempt
+        still running after hedge_delay() gets a duplicate on the next route (at
+        most max_hedges of them) and the first response wins."""
+        tried, hedges, pending = [], set(), set()
+        direct = hedged = 0
+        error = None
+
+        def next_route(hedge=False):
+            nonlocal direct
+            if len(tried) <= self.proxy_retries:
+                proxy_url = self.proxy_pool.acquire(exclude=tried, prefer=self.sessions.warm())
+                if proxy_url:
+                    tried.append(proxy_url)
+                    return proxy_url
+            # Direct once as the fallback; a hedge may open it once more next to it.
+            if direct >= (2 if hedge else 1) or (hedge and not self._direct_allowed()):
+                return False
+            if not hedge and not direct:
+                self._before_direct(label, tried)
+            direct += 1
+            return None
+
+        def launch(route, hedge=False):
+            # Hedges do not feed on_chunk, so a DL anchor is only sniffed once.
+            task = asyncio.ensure_future(self._attempt(url, route, label, headers, None if hedge else on_chunk))
+            task.add_done_callback(_discard)
+            pending.add(task)
+            if hedge:
+                hedges.add(task)
+                HEDGED_REQUESTS.inc("sent")
+
+        try:
+            while True:
+                if not pending:
+                    route = next_route()
+                    if route is False:
+                        raise error
+                    await self._spend_budget()
+                    launch(route)
+
+                delay = self.hedge_delay() if hedged < self.max_hedges else None
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged += 1
+                    route = next_route(hedge=True)
+                    # A hedge never waits for the budget; without a free slot it is skipped.
+                    if route is not False and (self.budget is None or (await self._reserve(0))[0] is not None):
+                        launch(route, hedge=True)
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+                    e = task.exception()
+                    if e is None:
+                        if task in hedges:
+                            HEDGED_REQUESTS.inc("won")
+                        return task.result()
+                    if isinstance(e, (BudgetExceeded, DeadlineExceeded)) or not is_proxy_fault(e):
+                        raise e
+                    error = e
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_page(self, url, label, on_chunk=None):
+        if self.pages is None:
+            resp = await self._fetch(url, label, on_chunk=on_chunk)
+            return Page(url, resp.content)
+        known = await asyncio.to_thread(self.pages.get, url)
+        resp = await self._fetch(url, label, self.pages.conditional(known), on_chunk)
+        return await asyncio.to_thread(self.pages.record, url, known, resp)
+
+    async def _parse_page(self, page, fn, *args):
+        if not isinstance(page, Page):
+            return await self._parse(fn, page, *args)
+        given = json.dumps(args, sort_keys=True)
+        output = self._reuse(page, fn, given)
+        if output is None:
+            output = await self._parse(fn, page.content, *args)
+            if self.pages is not None:
+                self.pages.stats["parsed"] += 1
+                await asyncio.to_thread(self.pages.save_parsed, page, fn.__name__, given, output)
+        return output
+
+    async def _search_response(self, query, page=1):
+        with stage("search_fetch"):
+            return await self._fetch_page(search_url(self.base_url, query, page), f"Search p{page}" if page > 1 else "Search")
+
+    async def iter_search(self, query, page=1):
+        """Yields ("last_page", n) and then ("result", result) for each card of one
+        search page as it is parsed. Yields nothing if the page cannot be fetched.
+        This is the async search entry point; ScrapeService walks and caches pages."""
+        try:
+            response = await self._search_response(query, page)
+        except (BudgetExceeded, DeadlineExceeded):
+            raise
+        except Exception as e:
+            if page > 1 and failure_class(e) == "not_found":
+                # Past the end of the results; WordPress answers 404 there.
+                yield "last_page", page - 1
+            else:
+                log.error(f"Search failed: {e}")
+            return
+
+        if self.parse_pool is not None or self.pages is not None:
+            # The stored output is the whole page, so cards only stream out of an
+            # in-process parse when there is nothing to keep.
+            with stage("search_parse"):
+                results, last = await self._parse_page(response, parse_search_page, self.parser)
+        else:
+            with stage("search_parse"):
+                soup = make_soup(response.content, self.parser)
+            results, last = iter_search_results(soup), last_page(soup)
+        yield "last_page", last
+        for result in results:
+            yield "result", result
+
+    def listing_url(self, page):
+        if page == 1:
+            return self.base_url
+        return f"{self.base_url}page/{page}/"
+
+    async def listing_page(self, page):
+        """Games on one page of the catalog listing. Fetch errors propagate, so a
+        404 past the last page can be told apart from a transient failure."""
+        fetched = await self._fetch_page(self.listing_url(page), f"Listing {page}")
+        return await self._parse_page(fetched, parse_search_results, self.parser)
+
+    async def fetch_game_page(self, url):
+        """The game page as a Page from the page store (``unchanged`` when upstream
+        says it has not changed since it was stored); links_from_game_page() takes it
+        as is. Fetch errors propagate."""
+        return await self._fetch_page(url, "Crawl")
+
+    async def _collect(self, events, current_size):
+        links, metadata = [], self._new_metadata(current_size)
+        async for kind, value in events:
+            if kind == "metadata":
+                metadata = value
+            elif kind == "failure":
+                metadata["failure"] = value
+            else:
+                links = value
+        return links, metadata
+
+    async def links_from_game_page(self, content, current_size="N/A", prefetched=None):
+        return await self._collect(self.iter_links_from_game_page(content, current_size, prefetched), current_size)
+
+    async def iter_links_from_game_page(self, content, current_size="N/A", prefetched=None):
+        """Yields ("metadata", metadata) as soon as the game page is parsed, then
+        ("links", links) once the DL page has been fetched and parsed. The metadata
+        dict is the same object throughout and gains the DL page fields in between.
+        ``content`` is the page bytes or a Page from _fetch_page()."""
+        prefetched = prefetched or {}
+        metadata = self._new_metadata(current_size)
+        try:
+            parsed, links, dl_url = await self._parse_page(
+                content, parse_game_page, metadata, self.parser, self.ignore_domains
+            )
+            metadata.update(parsed)
+            yield "metadata", metadata
+
+            if dl_url:
+                try:
+                    task = prefetched.pop(dl_url, None)
+                    with stage("dl_page_fetch"):
+                        dl_page = await task if task else await self._fetch_page(dl_url, "DL page")
+                    parsed, dl_links = await self._parse_page(
+                        dl_page, parse_dl_page, metadata, self.parser, self.ignore_domains
+                    )
+                    metadata.update(parsed)
+                    links = dl_links or links
+                except (BudgetExceeded, DeadlineExceeded):
+                    # Aborted, not empty: falling back to the game page links would
+                    # cache the dll- page URL itself as the result.
+                    raise
+                except Exception as e:
+                    log.warning(f"DL Page extract failed: {e}")
+
+            yield "links", links
+        finally:
+            # A sniffed anchor the parser did not pick is not worth finishing.
+            for task in prefetched.values():
+                task.cancel()
+
+    async def get_game_links(self, game_url, current_size="N/A"):
+        return await self._collect(self.iter_game_links(game_url, current_size), current_size)
+
+    async def iter_game_links(self, game_url, current_size="N/A"):
+        """Event stream behind get_game_links(); yields only ("failure", failure_class)
+        if the game page cannot be fetched."""
+        prefetched = {}
+        on_chunk = None
+        if self.scraper_cfg.get("prefetch_dl", DEFAULT_PREFETCH_DL):
+            # Start the DL page as soon as its anchor streams past, overlapping it with
+            # the rest of the game page download and the full parse.
+            def start_prefetch(dl_url):
+                task = asyncio.ensure_future(self._fetch_page(dl_url, "DL page"))
+                task.add_done_callback(_discard)
+                prefetched[dl_url] = task
+            on_chunk = DLAnchorSniffer(start_prefetch).feed
+
+        try:
+            with stage("game_page_fetch"):
+                page = await self._fetch_page(game_url, "Game page", on_chunk=on_chunk)
+        except Exception as e:
+            for task in prefetched.values():
+                task.cancel()
+            if isinstance(e, (BudgetExceeded, DeadlineExceeded)):
+                raise
+            log.error(f"Link extract failed: {e}")
+            yield "failure", failure_class(e)
+            return
+
+        async for event in self.iter_links_from_game_page(page, current_size, prefetched):
+            yield event
+
+    async def close(self):
+        if self._proxy_pool is not None:
+            self._proxy_pool.stop()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        if self.pages is not None:
+            self.pages.close()
+        for session in self.sessions.close_all():
+            await session.close()
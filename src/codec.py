@@ -0,0 +1,134 @@
+import json
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    msgpack = None
+    HAS_MSGPACK = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+# Binary layout: MAGIC, one version byte, one flags byte, then the msgpack payload.
+# JSON entries written before this format start with "{" and are still read as-is.
+MAGIC = b"PSC"
+VERSION = 1
+FLAG_ZSTD = 0x01
+HEADER_SIZE = len(MAGIC) + 2
+COMPRESS_MIN_BYTES = 512
+
+KIND_RAW = 0
+KIND_GAME = 1
+
+GAME_FIELDS = ("url", "title", "downloads", "image", "timestamp")
+LINK_KEYS = {"group", "label", "url"}
+
+def _intern(table, index, value):
+    position = index.get(value)
+    if position is None:
+        position = index[value] = len(table)
+        table.append(value)
+    return position
+
+def _pack_links(links):
+    # Grouped links repeat the same few group names and labels for every URL; store
+    # each string once and refer to it by position.
+    if not all(isinstance(link, dict) and link.keys() == LINK_KEYS for link in links):
+        return None
+    groups, group_index, labels, label_index = [], {}, [], {}
+    rows = [
+        [_intern(groups, group_index, link["group"]), _intern(labels, label_index, link["label"]), link["url"]]
+        for link in links
+    ]
+    return [groups, labels, rows]
+
+def _unpack_links(packed):
+    groups, labels, rows = packed
+    return [{"group": groups[g], "label": labels[l], "url": url} for g, l, url in rows]
+
+def _is_game_entry(entry):
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("metadata"), dict)
+        and isinstance(entry.get("links"), list)
+        and entry.keys() <= set(GAME_FIELDS) | {"size", "metadata", "links"}
+        and entry.get("size", entry["metadata"].get("size", "N/A")) == entry["metadata"].get("size", "N/A")
+    )
+
+def _compact(entry):
+    if not _is_game_entry(entry):
+        return [KIND_RAW, entry]
+    packed = _pack_links(entry["links"])
+    return [
+        KIND_GAME,
+        [entry.get(field) for field in GAME_FIELDS],
+        entry["metadata"],
+        packed if packed is not None else entry["links"],
+        packed is not None,
+    ]
+
+def _expand(value):
+    if value[0] == KIND_RAW:
+        return value[1]
+    _, fields, metadata, links, packed = value
+    entry = dict(zip(GAME_FIELDS, fields))
+    # size always mirrors metadata["size"] (see GameCache.save), so it is not stored twice.
+    entry["size"] = metadata.get("size", "N/A")
+    entry["links"] = _unpack_links(links) if packed else links
+    entry["metadata"] = metadata
+    return entry
+
+
+class EntryCodec:
+    """Encodes cache entries for the storage backends.
+
+    ``fmt`` is "msgpack" (compact, versioned binary) or "json" (the original plain
+    JSON text). ``compression`` "zstd" compresses binary payloads above
+    COMPRESS_MIN_BYTES. Decoding accepts every format regardless of these settings.
+    """
+
+    def __init__(self, fmt="msgpack", compression=None):
+        if fmt == "msgpack" and not HAS_MSGPACK:
+            fmt = "json"
+        self.fmt = fmt
+        self.compression = compression if compression == "zstd" and HAS_ZSTD else None
+        self._compressor = zstandard.ZstdCompressor(level=3) if self.compression else None
+        self._decompressor = zstandard.ZstdDecompressor() if HAS_ZSTD else None
+
+    @property
+    def binary(self):
+        return self.fmt == "msgpack"
+
+    def dumps(self, entry):
+        if not self.binary:
+            return json.dumps(entry)
+
+        payload = msgpack.packb(_compact(entry), use_bin_type=True)
+        flags = 0
+        if self._compressor and len(payload) >= COMPRESS_MIN_BYTES:
+            payload = self._compressor.compress(payload)
+            flags |= FLAG_ZSTD
+        return MAGIC + bytes((VERSION, flags)) + payload
+
+    def loads(self, data):
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data.startswith(MAGIC):
+            return json.loads(data)
+
+        version, flags = data[len(MAGIC)], data[len(MAGIC) + 1]
+        if version != VERSION:
+            raise ValueError(f"Unsupported cache entry version {version}")
+        payload = data[HEADER_SIZE:]
+        if flags & FLAG_ZSTD:
+            if self._decompressor is None:
+                raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+            payload = self._decompressor.decompress(payload)
+        if not HAS_MSGPACK:
+            raise ValueError("Cache entry is msgpack-encoded but msgpack is not installed")
+        return _expand(msgpack.unpackb(payload, raw=False, strict_map_key=False))
@@ -8,11 +8,74 @@ DEFAULTS = {
         "base_url": "https://www.superpsx.com/",
         "timeout": 15,
         "ignore_domains": [],
-        "proxy_file": "config/proxy.txt"
+        "proxy_file": "config/proxy.txt",
+        "max_clients": 100,
+        "parser": "auto",
+        "search_mode": "upstream",
+        "proxy_retries": 2,
+        "proxy_cooldown": 30,
+        "proxy_max_cooldown": 900,
+        "proxy_revalidate_interval": 30,
+        "proxy_probe_url": None,
+        "direct_fallback": True,
+        "session_idle_timeout": 60,
+        "warm_route_bonus": 2.0,
+        "prefetch_dl": True,
+        "upstream_rate": 5.0,
+        "upstream_burst": 10,
+        "upstream_max_wait": 10.0,
+        "search_pages": 3,
+        "parse_workers": 0,
+        "parse_queue": 0,
+        "timeout_min": 2.0,
+        "timeout_factor": 3.0,
+        "latency_window": 200,
+        "hedge_quantile": 0.9,
+        "max_hedges": 1,
+        "page_store": "data/pages.db",
+        "page_store_max_age": 2592000
+    },
+    "api": {
+        "batch_max_urls": 50,
+        "batch_concurrency": 8,
+        "batch_per_host": 4,
+        "batch_rate_limit": "5/minute",
+        "prefetch_top_n": 3,
+        "prefetch_concurrency": 2,
+        "prefetch_budget": 30,
+        "rate_limit_storage": None,
+        "search_max_pages": 10,
+        "defer_cache_load": True,
+        "request_deadline": 20.0
     },
     "database": {
+        "backend": "auto",
         "cache_file": "data/games_cache.json",
-        "cache_ttl": 31536000
+        "db_file": "data/games_cache.db",
+        "index_file": "data/search_index.db",
+        "cache_ttl": 31536000,
+        "soft_ttl": 604800,
+        "refresh_rate": 6,
+        "local_cache_size": 1024,
+        "local_cache_ttl": 300,
+        "invalidation": "pubsub",
+        "search_ttl": 3600,
+        "search_stale_ttl": 86400,
+        "negative_ttl": {"not_found": 600, "no_links": 300, "timeout": 60, "error": 60},
+        "negative_max_ttl": 86400,
+        "codec": "msgpack",
+        "compression": "none",
+        "redis_prefix": "ps_cache:"
+    },
+    "logging": {
+        "level": "INFO",
+        "format": "rich",
+        "file": "scraper.log",
+        "queue": True,
+        "queue_size": 10000,
+        "repeat_burst": 10,
+        "repeat_window": 10.0,
+        "repeat_sample": 100
     }
 }
 
@@ -28,8 +91,12 @@ class Config:
                     file_settings = json.load(f)
                     if "scraper" in file_settings:
                         final_settings["scraper"].update(file_settings["scraper"])
+                    if "api" in file_settings:
+                        final_settings["api"].update(file_settings["api"])
                     if "database" in file_settings:
                         final_settings["database"].update(file_settings["database"])
+                    if "logging" in file_settings:
+                        final_settings["logging"].update(file_settings["logging"])
                     if "webui" in file_settings:
                         final_settings["webui"] = bool(file_settings["webui"])
             except Exception as e:
@@ -38,16 +105,30 @@ class Config:
         env_base_url = os.getenv("SCRAPER_BASE_URL")
         if env_base_url:
             final_settings["scraper"]["base_url"] = env_base_url
+        env_log_level = os.getenv("LOG_LEVEL")
+        if env_log_level:
+            final_settings["logging"]["level"] = env_log_level
+        env_log_format = os.getenv("LOG_FORMAT")
+        if env_log_format:
+            final_settings["logging"]["format"] = env_log_format
         return final_settings
 
     @property
     def scraper(self):
         return self.settings.get("scraper", DEFAULTS["scraper"])
 
+    @property
+    def api(self):
+        return self.settings.get("api", DEFAULTS["api"])
+
     @property
     def database(self):
         return self.settings.get("database", DEFAULTS["database"])
 
+    @property
+    def logging(self):
+        return self.settings.get("logging", DEFAULTS["logging"])
+
     @property
     def webui(self):
         return bool(self.settings.get("webui", DEFAULTS["webui"]))
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+
+from src.logger import log
+from src.scraper import failure_class
+from src.rate_budget import BudgetExceeded
+from src.deadline import DeadlineExceeded
+
+DEFAULT_STATE_FILE = "data/crawl_state.json"
+DEFAULT_CONCURRENCY = 8
+
+class Crawler:
+    def __init__(self, scraper, db, state_file=DEFAULT_STATE_FILE, concurrency=DEFAULT_CONCURRENCY, max_pages=0):
+        self.scraper = scraper
+        self.db = db
+        self.state_file = state_file
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.state = {"next_page": 1, "finished": False}
+        self.stats = {"pages": 0, "fetched": 0, "unchanged": 0, "saved": 0, "failed": 0, "negative": 0}
+
+    def load_state(self, fresh=False):
+        if fresh or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self.state.update(json.load(f))
+            # Per-game validators from older checkpoints; the page store keeps them now.
+            self.state.pop("games", None)
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning(f"Ignoring unreadable crawl checkpoint {self.state_file}: {e}")
+
+    def save_state(self):
+        dirpath = os.path.dirname(self.state_file)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_file)
+
+    async def crawl_game(self, game, limit):
+        url = game["url"]
+        async with limit:
+            cached = await asyncio.to_thread(self.db.get, url)
+            if not cached and await asyncio.to_thread(self.db.get_negative, url):
+                self.stats["negative"] += 1
+                return
+            try:
+                # Conditional when the page store has seen it before.
+                page = await self.scraper.fetch_game_page(url)
+            except Exception as e:
+                log.warning(f"Crawl fetch failed for {url}: {e}")
+                self.stats["failed"] += 1
+                failure = failure_class(e)
+                if failure:
+                    await asyncio.to_thread(self.db.save_negative, url, failure)
+                return
+
+            self.stats["fetched"] += 1
+            # An unchanged page only helps while the cached entry is still there to reuse.
+            if cached and page.unchanged:
+                self.stats["unchanged"] += 1
+                return
+
+            try:
+                links, metadata = await self.scraper.links_from_game_page(page, game.get("size", "N/A"))
+            except (BudgetExceeded, DeadlineExceeded) as e:
+                # The DL page was refused; retried on the next pass, not negative-cached.
+                log.warning(f"Crawl of {url} aborted: {e}")
+                self.stats["failed"] += 1
+                return
+
+        if links:
+            await asyncio.to_thread(self.db.save, game, links, metadata)
+            self.stats["saved"] += 1
+        else:
+            self.stats["failed"] += 1
+            await asyncio.to_thread(self.db.save_negative, url, "no_links")
+
+    async def run(self, fresh=False):
+        self.load_state(fresh)
+        if self.state.get("finished"):
+            # Previous crawl completed: start an incremental pass from the first page.
+            self.state["next_page"] = 1
+            self.state["finished"] = False
+
+        limit = asyncio.Semaphore(self.concurrency)
+        page = self.state["next_page"]
+        crawled = 0
+
+        # max_pages caps the listing pages fetched by this run, wherever it resumes.
+        while not self.max_pages or crawled < self.max_pages:
+            crawled += 1
+            try:
+                games = await self.scraper.listing_page(page)
+            except Exception as e:
+                if failure_class(e) != "not_found":
+                    # Transient (5xx, timeout, budget): keep the checkpoint and resume here next run.
+                    log.warning(f"Pausing crawl at page {page}: {e}")
+                    break
+                log.info(f"Stopping crawl at page {page}: {e}")
+                games = []
+
+            if not games:
+                self.state["finished"] = True
+                break
+
+            await asyncio.gather(*(self.crawl_game(game, limit) for game in games))
+            self.stats["pages"] += 1
+            page += 1
+            self.state["next_page"] = page
+            self.save_state()
+            log.info(f"Crawled listing page {page - 1}: {len(games)} games ({self.stats})")
+
+        self.save_state()
+        return self.stats
@@ -1,7 +1,15 @@
-import json
+import importlib.util
 import os
 import time
-import redis
+import uuid
+import threading
+
+from src.storage import JSONStorage, SQLiteStorage, RedisStorage, DEFAULT_KEY_PREFIX
+from src.codec import EntryCodec
+from src.func.lru import LRUCache
+from src.func.search import normalize_query
+from src.search_index import SearchIndex
+from src.metrics import stage
 
 try:
     from src.config import cfg
@@ -9,57 +17,131 @@ except Exception:
     cfg = None
 
 DEFAULT_CACHE_FILE = "games_cache.json"
+DEFAULT_DB_FILE = "data/games_cache.db"
 DEFAULT_CACHE_TTL = 31536000
+DEFAULT_SOFT_TTL = 604800
+DEFAULT_BACKEND = "auto"
+DEFAULT_LOCAL_CACHE_SIZE = 1024
+DEFAULT_LOCAL_CACHE_TTL = 300
+DEFAULT_INVALIDATION = "pubsub"
+DEFAULT_SEARCH_TTL = 3600
+DEFAULT_SEARCH_STALE_TTL = 86400
+SEARCH_PREFIX = "search:"
+DEFAULT_INDEX_FILE = "data/search_index.db"
+NEGATIVE_PREFIX = "neg:"
+DEFAULT_NEGATIVE_TTL = {"not_found": 600, "no_links": 300, "timeout": 60, "error": 60}
+DEFAULT_NEGATIVE_MAX_TTL = 86400
+DEFAULT_CODEC = "msgpack"
+DEFAULT_COMPRESSION = "none"
+
+def _setting(key, default):
+    if cfg and getattr(cfg, "database", None) is not None:
+        try:
+            return cfg.database.get(key, default)
+        except Exception:
+            return default
+    return default
 
-if cfg and getattr(cfg, "database", None) is not None:
-    try:
-        CACHE_FILE = cfg.database.get("cache_file", DEFAULT_CACHE_FILE)
-        CACHE_TTL = cfg.database.get("cache_ttl", DEFAULT_CACHE_TTL)
-    except Exception:
-        CACHE_FILE = DEFAULT_CACHE_FILE
-        CACHE_TTL = DEFAULT_CACHE_TTL
-else:
-    CACHE_FILE = DEFAULT_CACHE_FILE
-    CACHE_TTL = DEFAULT_CACHE_TTL
+CACHE_FILE = _setting("cache_file", DEFAULT_CACHE_FILE)
+DB_FILE = _setting("db_file", DEFAULT_DB_FILE)
+CACHE_TTL = _setting("cache_ttl", DEFAULT_CACHE_TTL)
+SOFT_TTL = _setting("soft_ttl", DEFAULT_SOFT_TTL)
+BACKEND = _setting("backend", DEFAULT_BACKEND)
+LOCAL_CACHE_SIZE = _setting("local_cache_size", DEFAULT_LOCAL_CACHE_SIZE)
+LOCAL_CACHE_TTL = _setting("local_cache_ttl", DEFAULT_LOCAL_CACHE_TTL)
+INVALIDATION = _setting("invalidation", DEFAULT_INVALIDATION)
+SEARCH_TTL = _setting("search_ttl", DEFAULT_SEARCH_TTL)
+SEARCH_STALE_TTL = _setting("search_stale_ttl", DEFAULT_SEARCH_STALE_TTL)
+INDEX_FILE = _setting("index_file", DEFAULT_INDEX_FILE)
+NEGATIVE_TTL = dict(DEFAULT_NEGATIVE_TTL, **(_setting("negative_ttl", None) or {}))
+NEGATIVE_MAX_TTL = _setting("negative_max_ttl", DEFAULT_NEGATIVE_MAX_TTL)
+CODEC = _setting("codec", DEFAULT_CODEC)
+COMPRESSION = _setting("compression", DEFAULT_COMPRESSION)
+REDIS_PREFIX = _setting("redis_prefix", DEFAULT_KEY_PREFIX)
 
 class GameCache:
-    def __init__(self):
-        self._cache = {}
-        self.redis_client = None
+    def __init__(self, backend=None):
+        self.stats = {"hits": 0, "misses": 0, "stale_hits": 0, "search_hits": 0, "search_stale": 0, "search_misses": 0,
+                      "local_search_hits": 0, "local_search_misses": 0, "negative_hits": 0, "negative_saves": 0}
+        self.local = None
+        self.index = SearchIndex(INDEX_FILE) if INDEX_FILE else None
+        self.node_id = uuid.uuid4().hex
+        self._loaded = False
+        self._load_lock = threading.Lock()
         self.redis_url = os.getenv("REDIS_URL")
+        backend = backend or BACKEND
 
-        if self.redis_url:
-            try:
-                self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
-                print("[INFO] Connected to Redis Cloud Database")
-            except Exception as e:
-                print(f"[ERROR] Could not connect to Redis: {e}")
-                self.redis_client = None
+        use_redis = bool(self.redis_url) and backend in ("auto", "redis")
+        if use_redis and importlib.util.find_spec("redis") is None:
+            print("[ERROR] Could not connect to Redis: the redis package is not installed")
+            use_redis = False
+
+        codec = EntryCodec(CODEC, COMPRESSION)
+        if use_redis:
+            # The client is created, and the connection made, on the first command.
+            self.storage = RedisStorage(codec=codec, prefix=REDIS_PREFIX, url=self.redis_url)
+            if LOCAL_CACHE_SIZE:
+                self.local = LRUCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL)
+        elif backend == "json":
+            self.storage = JSONStorage(CACHE_FILE)
+        else:
+            self.storage = SQLiteStorage(DB_FILE, CACHE_TTL, legacy_json=CACHE_FILE, codec=codec)
 
     def load(self):
-        if os.path.exists(CACHE_FILE):
+        # Safe to call more than once or from a background thread; only the first
+        # call does the work.
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._load()
+            self._loaded = True
+
+    def _load(self):
+        self.storage.load()
+        if self.index is not None:
             try:
-                with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                    self._cache = json.load(f)
-            except (OSError, json.JSONDecodeError):
-                self._cache = {}
-        else:
-            self._cache = {}
+                if self.index.count() == 0:
+                    self.rebuild_index()
+            except Exception as e:
+                print(f"[ERROR] Could not open search index: {e}")
+                self.index = None
+        if self.local is not None and INVALIDATION != "none":
+            try:
+                self.storage.subscribe_invalidations(self._on_invalidate, self.node_id, INVALIDATION)
+            except Exception as e:
+                print(f"[ERROR] Could not subscribe to cache invalidations: {e}")
+
+    def _on_invalidate(self, key):
+        self.local.pop(key)
+
+    def peek(self, url):
+        # Same lookup as get() without counting towards hit/miss stats.
+        return self._lookup(url, count=False) is not None
 
     def get(self, url):
-        if self.redis_client:
-            try:
-                data_str = self.redis_client.get(url)
-                if not data_str:
-                    return None
-                data = json.loads(data_str)
-                if "metadata" not in data or not data.get("links"):
-                    return None
+        with stage("cache_get"):
+            data = self._lookup(url)
+        self.stats["hits" if data else "misses"] += 1
+        if data and self.is_stale(data):
+            self.stats["stale_hits"] += 1
+        return data
+
+    def is_stale(self, entry):
+        # Past the soft TTL an entry is still served, but should be re-scraped;
+        # CACHE_TTL remains the hard limit after which get() stops returning it.
+        return bool(SOFT_TTL) and time.time() - entry.get("timestamp", 0) > SOFT_TTL
+
+    def _lookup(self, url, count=True):
+        if self.local is not None:
+            data = self.local.get(url, count)
+            if data is not None:
                 return data
-            except Exception:
-                return None
 
-        data = self._cache.get(url)
+        try:
+            data = self.storage.get(url)
+        except Exception:
+            return None
+
         if not data:
             return None
 
@@ -73,37 +155,158 @@ class GameCache:
         if (time.time() - timestamp) > CACHE_TTL:
             return None
 
+        if self.local is not None:
+            self.local.put(url, data)
         return data
 
     def save(self, game_data, links, metadata):
-        cache_entry = {
-            "url": game_data["url"],
-            "title": game_data["title"],
-            "size": metadata.get("size", "N/A"),
-            "downloads": game_data.get("downloads", "N/A"),
-            "links": links,
-            "metadata": metadata,
-            "timestamp": time.time(),
-        }
+        with stage("cache_save"):
+            cache_entry = {
+                "url": game_data["url"],
+                "title": game_data.get("title", "N/A"),
+                "size": metadata.get("size", "N/A"),
+                "downloads": game_data.get("downloads", "N/A"),
+                "image": game_data.get("image"),
+                "links": links,
+                "metadata": metadata,
+                "timestamp": time.time(),
+            }
+
+            try:
+                self.storage.put(game_data["url"], cache_entry, CACHE_TTL)
+            except Exception as e:
+                print(f"[ERROR] Failed to save to {self.storage.name} cache: {e}")
+                return
 
-        if self.redis_client:
             try:
-                self.redis_client.setex(
-                    game_data["url"],
-                    CACHE_TTL,
-                    json.dumps(cache_entry)
-                )
+                self.storage.delete(NEGATIVE_PREFIX + game_data["url"])
             except Exception as e:
-                print(f"[ERROR] Failed to save to Redis: {e}")
-            return
+                print(f"[ERROR] Failed to clear negative cache entry: {e}")
 
-        self._cache[game_data["url"]] = cache_entry
+            if self.index is not None:
+                try:
+                    self.index.add(cache_entry)
+                except Exception as e:
+                    print(f"[ERROR] Failed to update search index: {e}")
+
+            if self.local is not None:
+                self.local.put(game_data["url"], cache_entry)
+                try:
+                    self.storage.publish_invalidation(game_data["url"], self.node_id)
+                except Exception as e:
+                    print(f"[ERROR] Failed to publish cache invalidation: {e}")
+
+    def get_negative(self, url):
+        # Active failure record for a URL whose last scrape found nothing.
+        try:
+            entry = self.storage.get(NEGATIVE_PREFIX + url)
+        except Exception:
+            return None
+        if not entry or entry.get("until", 0) <= time.time():
+            return None
+        self.stats["negative_hits"] += 1
+        return entry
+
+    def save_negative(self, url, failure):
+        """Remembers a failed scrape so the URL is not re-scraped for a while.
+
+        Each failure class has its own base TTL (database.negative_ttl). Repeated
+        failures of the same class double it, up to database.negative_max_ttl. The
+        record outlives its TTL so the next failure keeps escalating. A successful
+        save() clears it.
+        """
+        base = NEGATIVE_TTL.get(failure, 0)
+        if not base:
+            return 0
+        key = NEGATIVE_PREFIX + url
         try:
-            dirpath = os.path.dirname(CACHE_FILE)
-            if dirpath:
-                os.makedirs(dirpath, exist_ok=True)
-
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(self._cache, f, indent=4)
-        except OSError as e:
-            print(f"[ERROR] Failed to save cache: {e}")
\ No newline at end of file
+            previous = self.storage.get(key) or {}
+        except Exception:
+            previous = {}
+
+        counts = dict(previous.get("counts", {}))
+        counts[failure] = counts.get(failure, 0) + 1
+        ttl = min(NEGATIVE_MAX_TTL, base * 2 ** min(counts[failure] - 1, 20))
+        now = time.time()
+        entry = {"url": url, "failure": failure, "counts": counts, "until": now + ttl, "timestamp": now}
+        try:
+            self.storage.put(key, entry, NEGATIVE_MAX_TTL * 2)
+        except Exception as e:
+            print(f"[ERROR] Failed to save negative cache entry: {e}")
+            return 0
+        self.stats["negative_saves"] += 1
+        return ttl
+
+    def _search_key(self, query, page):
+        key = SEARCH_PREFIX + normalize_query(query)
+        return key if page == 1 else f"{key}#page={page}"
+
+    def get_search(self, query, page=1):
+        """Returns (results, stale, last_page) for one cached result page, or None.
+        Pages past the end are cached too, with empty results."""
+        try:
+            data = self.storage.get(self._search_key(query, page))
+        except Exception:
+            data = None
+
+        age = time.time() - data.get("timestamp", 0) if data else None
+        if not data or "results" not in data or age > SEARCH_STALE_TTL:
+            self.stats["search_misses"] += 1
+            return None
+
+        stale = age > SEARCH_TTL
+        self.stats["search_stale" if stale else "search_hits"] += 1
+        return data["results"], stale, data.get("last_page")
+
+    def save_search(self, query, results, page=1, last_page=None):
+        entry = {"query": normalize_query(query), "results": results, "timestamp": time.time()}
+        if page != 1 or last_page is not None:
+            entry.update(page=page, last_page=last_page)
+        try:
+            self.storage.put(self._search_key(query, page), entry, SEARCH_STALE_TTL)
+        except Exception as e:
+            print(f"[ERROR] Failed to save search to {self.storage.name} cache: {e}")
+
+    def rebuild_index(self):
+        entries = (entry for key, entry in self.storage.items() if not key.startswith((SEARCH_PREFIX, NEGATIVE_PREFIX)))
+        count = self.index.rebuild(entries)
+        if count:
+            print(f"[INFO] Indexed {count} cached games for local search")
+        return count
+
+    def search_local(self, query, limit=20):
+        if self.index is None:
+            return []
+        try:
+            results = self.index.search(query, limit)
+        except Exception as e:
+            print(f"[ERROR] Local search failed: {e}")
+            return []
+        self.stats["local_search_hits" if results else "local_search_misses"] += 1
+        return results
+
+    def hit_ratio(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return round(self.stats["hits"] / total, 4) if total else 0.0
+
+    def tier_stats(self):
+        tiers = {}
+        backend_hits = self.stats["hits"]
+        backend_lookups = self.stats["hits"] + self.stats["misses"]
+
+        if self.local is not None:
+            tiers["local"] = {
+                "hits": self.local.hits,
+                "misses": self.local.misses,
+                "hit_ratio": self.local.hit_ratio(),
+                "entries": len(self.local),
+            }
+            backend_hits -= self.local.hits
+            backend_lookups = self.local.misses
+
+        tiers[self.storage.name] = {
+            "hits": backend_hits,
+            "misses": backend_lookups - backend_hits,
+            "hit_ratio": round(backend_hits / backend_lookups, 4) if backend_lookups else 0.0,
+        }
+        return tiers
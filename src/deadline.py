@@ -0,0 +1,109 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+
+DEFAULT_REQUEST_DEADLINE = 20.0
+
+# Absolute time.monotonic() by which the current request must be answered. Tasks
+# copy the context they are created in, so fetches started on behalf of a request
+# (DL page prefetch, later search pages) inherit it; a shared single-flight scrape
+# runs under a SharedDeadline instead.
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    def __init__(self, over=0.0):
+        super().__init__(f"Request deadline exceeded by {over:.1f}s" if over > 0 else "Request deadline exceeded")
+
+
+class SharedDeadline:
+    """Deadline of work done for several callers at once: the latest of theirs, so
+    the work lasts as long as someone still waits for it (no limit if one has none)."""
+
+    def __init__(self):
+        self._waiters = {}
+        self._last = None
+
+    def join(self):
+        token = object()
+        self._waiters[token] = _current()
+        return token
+
+    def leave(self, token):
+        # Kept for whatever still checks it once nobody waits any more.
+        self._last = self.at()
+        self._waiters.pop(token, None)
+
+    @property
+    def waiters(self):
+        return len(self._waiters)
+
+    def at(self):
+        if not self._waiters:
+            return self._last
+        values = list(self._waiters.values())
+        return None if None in values else max(values)
+
+
+def _current():
+    value = _deadline.get()
+    return value.at() if isinstance(value, SharedDeadline) else value
+
+
+@contextmanager
+def deadline(seconds):
+    """Caps everything run inside to ``seconds`` from now; an enclosing, earlier
+    deadline still wins. ``None`` lifts the cap, for work that outlives a request."""
+    if seconds is None:
+        value = None
+    else:
+        value = time.monotonic() + seconds
+        outer = _current()
+        if outer is not None:
+            value = min(value, outer)
+    token = _deadline.set(value)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining():
+    """Seconds left before the current deadline, or None without one."""
+    value = _current()
+    return None if value is None else value - time.monotonic()
+
+def check():
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(-left)
+    return left
+
+def cap(seconds):
+    """``seconds`` limited to what is left of the deadline; raises once it has passed."""
+    left = check()
+    return seconds if left is None else min(seconds, left)
+
+async def bounded(awaitable):
+    """Awaits ``awaitable`` until the deadline; wrap it in asyncio.shield() to let the
+    underlying work carry on for others after this caller gives up."""
+    left = check()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        if remaining() > 0:
+            raise
+        raise DeadlineExceeded() from None
+
+async def unbounded(awaitable):
+    with deadline(None):
+        return await awaitable
+
+async def shared(awaitable, holder):
+    """Awaits ``awaitable`` under ``holder``, a SharedDeadline its callers join and leave."""
+    token = _deadline.set(holder)
+    try:
+        return await awaitable
+    finally:
+        _deadline.reset(token)
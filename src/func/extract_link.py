@@ -1,5 +1,4 @@
 import re
-from bs4 import BeautifulSoup
 from src.logger import log
 # basically the same as before, but with added logging and error handling, nothing changes just more clean i guess.
 def extract_links(soup, ignore_domains):
@@ -0,0 +1,67 @@
+import re
+from src.logger import log
+from src.func.parse import apply_metadata_row
+from src.func.extract_link import extract_links
+
+# Single walk over every table/row/cell that produces both what parse_metadata
+# and extract_grouped_links would, without finding and stringifying each cell twice.
+def extract_page(soup, metadata, ignore_domains):
+    grouped_links = []
+    seen_urls = set()
+    found_structured_links = False
+
+    try:
+        for table in soup.find_all("table"):
+            rows = [row.find_all("td") for row in table.find_all("tr")]
+            if not rows:
+                continue
+
+            block_name = "General / Misc"
+            block_found = False
+
+            for cols in rows:
+                if len(cols) >= 2:
+                    header_raw = cols[0].get_text(strip=True)
+                    val = cols[1].get_text(strip=True, separator=" ")
+                    apply_metadata_row(cols[0].get_text(strip=True, separator=" ").lower(), val, metadata)
+
+                    if not block_found and "version" in header_raw.lower():
+                        clean_ver = re.sub(r'(?i)thanks?.*', '', val).strip()
+                        clean_ver = re.sub(r'[\u200b-\u200d\uFEFF]', '', clean_ver)
+                        if len(clean_ver) > 3:
+                            block_name = clean_ver
+                        block_found = True
+
+            for cols in rows:
+                if not cols:
+                    continue
+
+                if len(cols) >= 2:
+                    row_label = cols[0].get_text(strip=True).replace("⇛", "").strip()
+                    content_col = cols[1]
+                else:
+                    row_label = "Link"
+                    content_col = cols[0]
+
+                for link in content_col.find_all("a", href=True):
+                    href = link["href"]
+                    if any(domain in href.lower() for domain in ignore_domains):
+                        continue
+                    if href.startswith("http") and len(href) > 15 and href not in seen_urls:
+                        grouped_links.append({
+                            "group": block_name,
+                            "label": row_label if row_label else "Download",
+                            "url": href
+                        })
+                        seen_urls.add(href)
+                        found_structured_links = True
+    except Exception as e:
+        log.error(f"Error extracting page: {e}", exc_info=True)
+        return metadata, []
+
+    if not found_structured_links:
+        log.debug("No structured tables found, falling back to raw link extraction.")
+        raw = extract_links(soup, ignore_domains)
+        grouped_links = [{"group": "All Links", "label": "Link", "url": u} for u in raw]
+
+    return metadata, grouped_links
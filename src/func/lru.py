@@ -0,0 +1,52 @@
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, count=True):
+        # count=False reads without touching hits/misses (e.g. cache peeks).
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += count
+                return None
+
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += count
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += count
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else 0.0
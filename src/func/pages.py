@@ -0,0 +1,30 @@
+import re
+
+from src.func.extract_page import extract_page
+from src.func.soup import make_soup
+from src.metrics import stage
+
+# Plain functions of (bytes, dict) -> plain data, so they can also run in a
+# ParsePool worker process.
+
+def parse_game_page(content, metadata, parser, ignore_domains):
+    with stage("soup"):
+        soup = make_soup(content, parser)
+    with stage("extract"):
+        _, page_links = extract_page(soup, metadata, ignore_domains)
+
+    title_node = soup.find("h1", class_="entry-title")
+    if title_node:
+        metadata.setdefault("title", title_node.get_text(strip=True))
+
+    dl_node = soup.find("a", href=re.compile(r"dll-")) or \
+              soup.select_one("a:has(img[alt*='Download'])")
+    dl_url = dl_node.get("href") if dl_node else None
+    return metadata, page_links, dl_url
+
+def parse_dl_page(content, metadata, parser, ignore_domains):
+    with stage("soup"):
+        dl_soup = make_soup(content, parser)
+    with stage("extract"):
+        _, links = extract_page(dl_soup, metadata, ignore_domains)
+    return metadata, links
@@ -1,69 +1,65 @@
 import urllib.parse
-from bs4 import BeautifulSoup
-from src.func.get_proxy import get_proxy
-from src.logger import log
+from src.func.soup import make_soup
 
-def search_games(scraper, base_url, timeout, proxies, query):
-    params = {"s": query}
-    url = f"{base_url}?{urllib.parse.urlencode(params)}"
-
-    proxy = get_proxy(proxies)
+DEFAULT_SEARCH_PAGES = 3
 
-    if proxy:
-        log.debug(f"Search Proxy: {proxy.get('https')}")
+def normalize_query(query):
+    return " ".join(query.lower().split())
 
-    try:
-        response = scraper.get(
-            url,
-            timeout=timeout,
-            impersonate="chrome",
-            proxies=proxy
-        )
-        response.raise_for_status()
-    except Exception as e:
-        if proxy:
-            failed_proxy_url = proxy.get('https')
-            log.warning(f"Proxy {failed_proxy_url} failed during search.")
-            
-            if failed_proxy_url in proxies:
-                proxies.remove(failed_proxy_url)
-                log.info(f"Removed bad proxy. {len(proxies)} remaining.")
-            
-            log.warning("Retrying search with direct connection...")
-            try:
-                response = scraper.get(
-                    url,
-                    timeout=timeout,
-                    impersonate="chrome",
-                    proxies=None
-                )
-                response.raise_for_status()
-            except Exception as final_e:
-                log.error(f"Search failed (Direct): {final_e}")
-                return []
-        else:
-            log.error(f"Search failed: {e}")
-            return []
+def search_url(base_url, query, page=1):
+    params = {"s": query}
+    if page > 1:
+        return f"{base_url}page/{page}/?{urllib.parse.urlencode(params)}"
+    return f"{base_url}?{urllib.parse.urlencode(params)}"
 
-    soup = BeautifulSoup(response.content, "html.parser")
-    results = []
-    items = soup.select("article.item")
+def last_page(soup):
+    # Highest number in the WordPress pagination bar. Without one, a "next" link means
+    # more pages of unknown count (None); neither means this is the only page.
+    numbers = [
+        int(text) for text in
+        (node.get_text(strip=True).replace(",", "") for node in soup.select(".page-numbers"))
+        if text.isdigit()
+    ]
+    if numbers:
+        return max(numbers)
+    if soup.select_one("link[rel=next], a[rel=next], a.next"):
+        return None
+    return 1
 
-    for item in items:
-        title_node = item.select_one(".penci-entry-title a")
+def iter_search_results(soup):
+    for item in soup.find_all("article", class_="item"):
+        title_node = None
+        for heading in item.find_all(class_="penci-entry-title"):
+            title_node = heading.find("a")
+            if title_node:
+                break
         if not title_node:
             continue
 
-        img_node = item.select_one(".thumbnail")
+        img_node = item.find(class_="thumbnail")
         image = img_node.get("data-bgset") if img_node else None
 
-        results.append({
+        yield {
             "title": title_node.get_text(strip=True),
             "url": title_node["href"],
             "image": image,
             "downloads": "N/A",
             "size": "N/A",
-        })
-    
-    log.info(f"Search for '{query}' returned {len(results)} results.")
-    return results
\ No newline at end of file
+        }
+
+def parse_search_results(content, parser="html.parser"):
+    return list(iter_search_results(make_soup(content, parser)))
+
+def dedupe_results(results, seen=None):
+    # Results can shift between pages while they are fetched; keep the first copy.
+    seen = set() if seen is None else seen
+    unique = []
+    for result in results:
+        if result["url"] not in seen:
+            seen.add(result["url"])
+            unique.append(result)
+    return unique
+
+def parse_search_page(content, parser="html.parser"):
+    soup = make_soup(content, parser)
+    return list(iter_search_results(soup)), last_page(soup)
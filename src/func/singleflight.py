@@ -0,0 +1,48 @@
+import asyncio
+
+from src.deadline import SharedDeadline, bounded, check, shared
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        check()
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            task, holder = flight
+        else:
+            # The shared work runs until the latest deadline among its waiters, so
+            # callers that join later are only held to their own.
+            holder = SharedDeadline()
+            task = asyncio.ensure_future(shared(fn(), holder))
+            self._inflight[key] = (task, holder)
+            # Clear on completion rather than in a finally: if the caller that started
+            # the flight is cancelled, the shared task keeps running for the others.
+            task.add_done_callback(lambda t: self._done(key, t))
+
+        waiter = holder.join()
+        try:
+            # Each caller waits until its own deadline; the shared task keeps running.
+            return await bounded(asyncio.shield(task))
+        finally:
+            holder.leave(waiter)
+            if not holder.waiters and not task.done():
+                # The last waiter gave up: nobody is left to use the result.
+                task.cancel()
+                self._forget(key, task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+
+    def _done(self, key, task):
+        self._forget(key, task)
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def inflight(self):
+        return len(self._inflight)
@@ -0,0 +1,26 @@
+import html
+import re
+
+DL_ANCHOR_RE = re.compile(rb'<a\s[^>]*?href\s*=\s*["\']([^"\']*dll-[^"\']*)["\']', re.IGNORECASE)
+TAIL_BYTES = 1024
+
+class DLAnchorSniffer:
+    """Spots the first ``dll-`` anchor in a streamed game page before it is fully read."""
+
+    def __init__(self, on_found):
+        self.on_found = on_found
+        self.url = None
+        self._tail = b""
+
+    def feed(self, chunk):
+        if self.url:
+            return
+        data = self._tail + chunk
+        match = DL_ANCHOR_RE.search(data)
+        if not match:
+            # Keep enough of the previous chunk to catch an anchor split across chunks.
+            self._tail = data[-TAIL_BYTES:]
+            return
+        self.url = html.unescape(match.group(1).decode("utf-8", "replace"))
+        self._tail = b""
+        self.on_found(self.url)
@@ -0,0 +1,15 @@
+from importlib.util import find_spec
+
+# Checked without importing lxml; BeautifulSoup itself is imported on first parse.
+HAS_LXML = find_spec("lxml") is not None
+
+def resolve_parser(name="auto"):
+    if name == "auto":
+        return "lxml" if HAS_LXML else "html.parser"
+    if name == "lxml" and not HAS_LXML:
+        return "html.parser"
+    return name
+
+def make_soup(content, parser="html.parser"):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, parser)
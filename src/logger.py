@@ -1,42 +1,196 @@
+import atexit
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from rich.logging import RichHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-def setup_logger(name: str = "ps_scraper", log_level: str = "INFO"):
+try:
+    from src.config import cfg
+except Exception:
+    cfg = None
+
+DEFAULT_SETTINGS = {
+    "level": "INFO",
+    "format": "rich",
+    "file": "scraper.log",
+    "queue": True,
+    "queue_size": 10000,
+    "repeat_burst": 10,
+    "repeat_window": 10.0,
+    "repeat_sample": 100,
+}
+
+_pipelines = {}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RepeatFilter(logging.Filter):
+    """Lets ``burst`` records per call site through every ``window`` seconds. Past
+    that, only one in ``sample`` gets through (none if ``sample`` is 0), carrying the
+    number dropped since the last one. ERROR and above always pass: messages are
+    f-strings, so one call site can carry a different failure (URL, cause) each time."""
+
+    def __init__(self, burst, window, sample=0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sample = sample
+        self.suppressed = 0
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or record.created - site[0] >= self.window:
+                # [window start, records seen in it, dropped since the last one let through]
+                site = self._sites[key] = [record.created, 0, site[2] if site else 0]
+            site[1] += 1
+            over = site[1] - self.burst
+            if over > 0 and not (self.sample and over % self.sample == 0):
+                site[2] += 1
+                self.suppressed += 1
+                return False
+            dropped, site[2] = site[2], 0
+        if dropped:
+            record.suppressed = dropped
+            record.msg = f"{record.getMessage()} ({dropped} similar suppressed)"
+            record.args = None
+        return True
+
+
+class LogQueueHandler(QueueHandler):
+    """Hands records to the listener thread; a full queue drops instead of blocking."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same process, so the record itself can cross: only the message is resolved
+        # here, and formatting (tracebacks included) happens on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Waits for room instead of failing when the queue is full at shutdown.
+        self.queue.put(self._sentinel)
+
+
+def _settings():
+    settings = dict(DEFAULT_SETTINGS)
+    if cfg is not None:
+        try:
+            settings.update(cfg.logging)
+        except Exception:
+            pass
+    return settings
+
+def _handlers(settings, log_level):
+    if settings["format"] == "json":
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(JSONFormatter())
+    else:
+        from rich.logging import RichHandler
+        console_handler = RichHandler(
+            rich_tracebacks=True,
+            markup=True,
+            show_time=True,
+            show_path=False
+        )
+    console_handler.setLevel(log_level)
+    handlers = [console_handler]
+
+    if settings["file"]:
+        file_handler = RotatingFileHandler(
+            settings["file"],
+            maxBytes=5*1024*1024,
+            backupCount=5,
+            encoding="utf-8"
+        )
+        file_handler.setLevel(logging.DEBUG)
+        if settings["format"] == "json":
+            file_handler.setFormatter(JSONFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            ))
+        handlers.append(file_handler)
+    return handlers
+
+def setup_logger(name: str = "ps_scraper", log_level: str = None, settings: dict = None):
+    settings = dict(_settings(), **(settings or {}))
+    log_level = log_level or settings["level"]
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
-    
+
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
 
     if logger.handlers:
         return logger
 
-    console_handler = RichHandler(
-        rich_tracebacks=True,
-        markup=True,
-        show_time=True,
-        show_path=False
-    )
-    console_handler.setLevel(log_level)
-    
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    file_handler = RotatingFileHandler(
-        "scraper.log", 
-        maxBytes=5*1024*1024,
-        backupCount=5, 
-        encoding="utf-8"
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(file_formatter)
-
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    handlers = _handlers(settings, log_level)
+    repeat = None
+    if settings["repeat_burst"]:
+        repeat = RepeatFilter(settings["repeat_burst"], settings["repeat_window"], settings["repeat_sample"])
+        logger.addFilter(repeat)
+
+    front = None
+    if settings["queue"]:
+        # Callers only pay for the level check, the repeat filter and an enqueue;
+        # console rendering and file I/O run on the listener thread.
+        log_queue = queue.Queue(settings["queue_size"] or 0)
+        front = LogQueueHandler(log_queue)
+        listener = LogQueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(front)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
+    _pipelines[name] = (repeat, front)
     return logger
 
-log = setup_logger()
\ No newline at end of file
+def log_stats(name: str = "ps_scraper"):
+    repeat, front = _pipelines.get(name, (None, None))
+    return {
+        "suppressed": repeat.suppressed if repeat else 0,
+        "dropped": front.dropped if front else 0,
+        "queued": front.queue.qsize() if front else 0,
+    }
+
+log = setup_logger()
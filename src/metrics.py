@@ -0,0 +1,183 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def proxy_label(proxy_url):
+    # Proxy URLs often carry credentials; only host:port ever leaves the process.
+    parsed = urlparse(proxy_url if "://" in proxy_url else f"http://{proxy_url}")
+    host = parsed.hostname or "unknown"
+    return f"{host}:{parsed.port}" if parsed.port else host
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(counts), total, count) for k, (counts, total, count) in self._series.items()]
+
+        lines = []
+        for labelvalues, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = _labels(self.labelnames, labelvalues, [("le", _number(float(bound)))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        # collect() yields (name, kind, help, [(labels_dict, value), ...]) read at scrape time,
+        # so state that is already counted elsewhere (cache stats, proxy pool) is not duplicated.
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
+
+STAGE_SECONDS = metrics.histogram(
+    "ps_stage_seconds", "Time spent in each scrape pipeline stage.", ["stage"]
+)
+UPSTREAM_RESPONSES = metrics.counter(
+    "ps_upstream_responses_total", "Upstream responses by HTTP status and route.", ["status", "route"]
+)
+BUDGET_REJECTED = metrics.counter(
+    "ps_budget_rejected_total", "Upstream requests refused because the shared budget queue was full."
+)
+HEDGED_REQUESTS = metrics.counter(
+    "ps_hedged_requests_total", "Duplicate upstream requests sent after an attempt ran past the hedge delay, and how many won.", ["outcome"]
+)
+DEADLINE_EXCEEDED = metrics.counter(
+    "ps_deadline_exceeded_total", "API requests that ran out of their deadline.", ["endpoint"]
+)
+
+# Set in parse worker processes: stage timings are collected here and sent back with
+# the result, because the worker's own registry is never scraped.
+_captured = contextvars.ContextVar("captured_stages", default=None)
+
+@contextmanager
+def _capture(name, timings):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((name, time.perf_counter() - started))
+
+def stage(name):
+    timings = _captured.get()
+    if timings is not None:
+        return _capture(name, timings)
+    return STAGE_SECONDS.time(name)
+
+def run_captured(fn, *args):
+    """fn(*args) and the [(stage, seconds)] timed inside it, for record_stages()."""
+    timings = []
+    token = _captured.set(timings)
+    try:
+        return fn(*args), timings
+    finally:
+        _captured.reset(token)
+
+def record_stages(timings):
+    for name, seconds in timings:
+        STAGE_SECONDS.observe(seconds, name)
+
+def record_upstream(status, proxied):
+    UPSTREAM_RESPONSES.inc(str(status), "proxy" if proxied else "direct")
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from src.logger import log
+
+DEFAULT_PAGE_STORE_FILE = "data/pages.db"
+DEFAULT_PAGE_STORE_MAX_AGE = 2592000
+# How often a long-running process drops rows older than max_age.
+PURGE_INTERVAL = 3600
+
+class Page:
+    """An upstream page as fetched through the store. ``unchanged`` when upstream
+    answered 304 (``content`` is then the stored body) or sent the body already
+    stored; ``parsed`` holds what was extracted from it last time."""
+
+    __slots__ = ("url", "content", "hash", "unchanged", "parsed")
+
+    def __init__(self, url, content, body_hash=None, unchanged=False, parsed=None):
+        self.url = url
+        self.content = content
+        self.hash = body_hash
+        self.unchanged = unchanged
+        self.parsed = parsed or {}
+
+
+class PageStore:
+    """Last raw response per upstream URL (compressed body, its hash, ETag and
+    Last-Modified) plus what each parser extracted from it, so a refresh can be a
+    conditional request and an unchanged page is not parsed again."""
+
+    def __init__(self, path, max_age=DEFAULT_PAGE_STORE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.stats = {"new": 0, "changed": 0, "not_modified": 0, "same_body": 0, "reused": 0, "parsed": 0, "purged": 0}
+        self._conn = None
+        self._lock = threading.RLock()
+        self._next_purge = 0.0
+
+    def _db(self):
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self):
+        with self._lock:
+            if self._conn is not None:
+                return
+
+            dirpath = os.path.dirname(self.path)
+            if dirpath:
+                os.makedirs(dirpath, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, hash TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "checked REAL NOT NULL, body BLOB NOT NULL, parsed TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_checked ON pages (checked)")
+            self._conn = conn
+            self.purge()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def purge(self):
+        """Drops rows not checked for max_age seconds; runs on open and then at most
+        every PURGE_INTERVAL seconds from record()."""
+        self._next_purge = time.monotonic() + PURGE_INTERVAL
+        if not self.max_age:
+            return 0
+        try:
+            with self._lock:
+                deleted = self._db().execute(
+                    "DELETE FROM pages WHERE checked < ?", (time.time() - self.max_age,)
+                ).rowcount
+        except sqlite3.Error as e:
+            log.warning(f"Page store purge failed: {e}")
+            return 0
+        self.stats["purged"] += deleted
+        return deleted
+
+    def count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def _write(self, sql, params):
+        # The store only saves work; a failed write must not fail the scrape.
+        try:
+            with self._lock:
+                self._db().execute(sql, params)
+        except sqlite3.Error as e:
+            log.warning(f"Page store write failed: {e}")
+
+    def get(self, url):
+        try:
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT hash, etag, last_modified, body, parsed FROM pages WHERE url = ?", (url,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"Page store read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return {"hash": row[0], "etag": row[1], "last_modified": row[2], "body": row[3], "parsed": row[4]}
+
+    def conditional(self, known):
+        """Request headers that let upstream answer 304 for ``known``."""
+        if not known:
+            return None
+        headers = {}
+        if known["etag"]:
+            headers["If-None-Match"] = known["etag"]
+        if known["last_modified"]:
+            headers["If-Modified-Since"] = known["last_modified"]
+        return headers or None
+
+    def record(self, url, known, resp):
+        """Stores the response to a (conditional) request for ``url`` and returns it as a Page."""
+        if self._conn is not None and time.monotonic() >= self._next_purge:
+            self.purge()
+        etag = resp.headers.get("etag") or (known["etag"] if known else None)
+        last_modified = resp.headers.get("last-modified") or (known["last_modified"] if known else None)
+
+        if known and resp.status_code == 304:
+            self.stats["not_modified"] += 1
+            content = zlib.decompress(known["body"])
+            body_hash = known["hash"]
+        else:
+            content = resp.content
+            body_hash = hashlib.sha256(content).hexdigest()
+
+        if known and body_hash == known["hash"]:
+            if resp.status_code != 304:
+                self.stats["same_body"] += 1
+            self._write(
+                "UPDATE pages SET etag = ?, last_modified = ?, checked = ? WHERE url = ?",
+                (etag, last_modified, time.time(), url),
+            )
+            return Page(url, content, body_hash, True, json.loads(known["parsed"] or "{}"))
+
+        self.stats["changed" if known else "new"] += 1
+        self._write(
+            "INSERT OR REPLACE INTO pages (url, hash, etag, last_modified, checked, body, parsed) "
+            "VALUES (?, ?, ?, ?, ?, ?, NULL)",
+            (url, body_hash, etag, last_modified, time.time(), zlib.compress(content)),
+        )
+        return Page(url, content, body_hash)
+
+    def save_parsed(self, page, kind, given, output):
+        # Keyed by parser and its arguments: the same page parsed with other input
+        # metadata gives other output. Only written if the body is still the stored one.
+        page.parsed[kind] = {"input": given, "output": output}
+        self._write(
+            "UPDATE pages SET parsed = ? WHERE url = ? AND hash = ?",
+            (json.dumps(page.parsed), page.url, page.hash),
+        )
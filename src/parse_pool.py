@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.logger import log
+from src.metrics import stage, run_captured, record_stages
+
+DEFAULT_PARSE_WORKERS = 0
+QUEUE_PER_WORKER = 4
+
+class ParsePool:
+    """Runs HTML parsing and extraction in worker processes, off the event loop and
+    outside the GIL. Jobs take raw bytes and return plain dicts/lists.
+
+    At most ``max_pending`` jobs are queued or running at once. Further callers wait
+    for a slot, so a traffic spike queues up as suspended coroutines rather than as
+    page bodies piling up in the executor's pipe.
+    """
+
+    def __init__(self, workers, max_pending=None):
+        self.workers = workers
+        self.max_pending = max_pending or workers * QUEUE_PER_WORKER
+        self.stats = {"jobs": 0, "waited": 0, "restarts": 0}
+        self.pending = 0
+        self._executor = None
+        self._slots = None
+
+    def _ensure_executor(self):
+        if self._executor is None:
+            # spawn, not fork: the parent has curl and proxy revalidation threads running.
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._executor
+
+    async def run(self, fn, *args):
+        executor = self._ensure_executor()
+        if self._slots.locked():
+            self.stats["waited"] += 1
+        async with self._slots:
+            self.pending += 1
+            self.stats["jobs"] += 1
+            try:
+                with stage("parse_pool"):
+                    result, timings = await asyncio.get_running_loop().run_in_executor(executor, run_captured, fn, *args)
+                # soup/extract ran in the worker; their timings come back with the result.
+                record_stages(timings)
+                return result
+            except BrokenProcessPool:
+                # A worker died (OOM, segfault in a parser); start a fresh pool next time.
+                if self._executor is executor:
+                    log.error("Parse worker pool broke; restarting it.")
+                    self._executor = None
+                    self.stats["restarts"] += 1
+                    executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            finally:
+                self.pending -= 1
+
+    def snapshot(self):
+        return dict(self.stats, workers=self.workers, max_pending=self.max_pending, pending=self.pending)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def make_parse_pool(scraper_cfg):
+    workers = scraper_cfg.get("parse_workers", DEFAULT_PARSE_WORKERS)
+    if workers == "auto":
+        workers = multiprocessing.cpu_count()
+    if not workers:
+        return None
+    return ParsePool(workers, scraper_cfg.get("parse_queue") or None)
@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+
+from src.logger import log
+from src.metrics import proxy_label
+
+DEFAULT_COOLDOWN = 30
+DEFAULT_MAX_COOLDOWN = 900
+DEFAULT_REVALIDATE_INTERVAL = 30
+DEFAULT_WARM_BONUS = 2.0
+
+class ProxyState:
+    def __init__(self, url):
+        self.url = url
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        self.cooldown_until = 0.0
+
+    @property
+    def cooling(self):
+        return self.cooldown_until > time.monotonic()
+
+    def score(self):
+        # Laplace-smoothed success rate over an EWMA of latency; unknown proxies get a
+        # neutral latency so new entries are still picked and measured.
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        latency = self.latency if self.latency is not None else 1.0
+        return success_rate / (latency + 0.1)
+
+    def snapshot(self):
+        # Served on /stats, so credentials in the proxy URL are stripped.
+        return {
+            "url": proxy_label(self.url),
+            "successes": self.successes,
+            "failures": self.failures,
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "score": round(self.score(), 4),
+            "cooling": self.cooling,
+        }
+
+
+class ProxyPool:
+    def __init__(self, proxies, cooldown=DEFAULT_COOLDOWN, max_cooldown=DEFAULT_MAX_COOLDOWN, warm_bonus=DEFAULT_WARM_BONUS):
+        self._states = {url: ProxyState(url) for url in dict.fromkeys(proxies)}
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.warm_bonus = warm_bonus
+        self._lock = threading.Lock()
+        self._revalidator = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self._states)
+
+    def available(self):
+        with self._lock:
+            return sum(1 for s in self._states.values() if not s.cooling)
+
+    def acquire(self, exclude=(), prefer=()):
+        # While the re-validator runs, proxies that failed stay out until a probe passes;
+        # without it, an expired cool-down lets the next request act as the probe.
+        # Proxies in ``prefer`` (warm connections) get their weight multiplied by warm_bonus.
+        probing = self._revalidator is not None
+        with self._lock:
+            candidates = [
+                s for s in self._states.values()
+                if not s.cooling and s.url not in exclude
+                and not (probing and s.consecutive_failures)
+            ]
+            if not candidates:
+                return None
+            weights = [s.score() * (self.warm_bonus if s.url in prefer else 1) for s in candidates]
+            return random.choices(candidates, weights=weights, k=1)[0].url
+
+    def report_success(self, url, latency):
+        with self._lock:
+            state = self._states.get(url)
+            if not state:
+                return
+            state.successes += 1
+            state.consecutive_failures = 0
+            state.cooldown_until = 0.0
+            state.latency = latency if state.latency is None else 0.7 * state.latency + 0.3 * latency
+
+    def report_failure(self, url):
+        with self._lock:
+            state = self._states.get(url)
+            if not state:
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            backoff = min(self.cooldown * 2 ** (state.consecutive_failures - 1), self.max_cooldown)
+            state.cooldown_until = time.monotonic() + backoff
+            left = sum(1 for s in self._states.values() if not s.cooling)
+        log.warning(f"Proxy {url} cooling down for {backoff:.0f}s. {left}/{len(self._states)} available.")
+
+    def snapshot(self):
+        with self._lock:
+            return [s.snapshot() for s in self._states.values()]
+
+    def revalidate(self, probe):
+        with self._lock:
+            due = [s.url for s in self._states.values() if s.consecutive_failures and not s.cooling]
+
+        for url in due:
+            started = time.perf_counter()
+            try:
+                probe(url)
+            except Exception as e:
+                log.debug(f"Proxy probe failed for {url}: {e}")
+                self.report_failure(url)
+                continue
+            self.report_success(url, time.perf_counter() - started)
+            log.info(f"Proxy {url} passed re-validation and is back in the pool.")
+
+    def start_revalidation(self, probe, interval=DEFAULT_REVALIDATE_INTERVAL):
+        if self._revalidator is not None or not self._states:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.revalidate(probe)
+                except Exception as e:
+                    log.error(f"Proxy re-validation loop error: {e}")
+
+        self._revalidator = threading.Thread(target=loop, name="proxy-revalidator", daemon=True)
+        self._revalidator.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def proxy_dict(proxy_url):
+    if not proxy_url:
+        return None
+    return {"http": proxy_url, "https": proxy_url}
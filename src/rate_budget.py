@@ -0,0 +1,127 @@
+import importlib.util
+import threading
+import time
+
+from src.logger import log
+
+DEFAULT_UPSTREAM_RATE = 5.0
+DEFAULT_UPSTREAM_BURST = 10
+DEFAULT_UPSTREAM_MAX_WAIT = 10.0
+BUDGET_KEY = "ps_budget:upstream"
+REDIS_RETRY_INTERVAL = 30
+
+class BudgetExceeded(RuntimeError):
+    def __init__(self, wait):
+        super().__init__(f"Upstream request budget exhausted; next slot in {wait:.1f}s")
+        self.wait = wait
+
+
+class TokenBucket:
+    """Per-process token bucket that hands out reservations instead of refusals.
+
+    reserve() takes a token if one is free. Otherwise it books the next future token
+    (letting the balance go negative) and returns how long the caller must wait.
+    Callers are therefore served in arrival order. A booking further out than
+    ``max_wait`` is refused without consuming anything.
+    """
+
+    name = "local"
+    blocking = False
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None, wait
+            self._tokens -= 1
+            return wait, wait
+
+
+# Same algorithm as TokenBucket, evaluated atomically inside Redis against the
+# server clock so every worker and replica draws from one bucket.
+RESERVE_SCRIPT = """
+redis.replicate_commands()
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens < 1 then wait = (1 - tokens) / rate end
+if wait > max_wait then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    return {0, tostring(wait)}
+end
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + math.ceil(max_wait) + 60)
+return {1, tostring(wait)}
+"""
+
+class RedisTokenBucket:
+    name = "redis"
+    blocking = True
+
+    def __init__(self, client, rate, burst, key=BUDGET_KEY):
+        # ``client`` is a Redis client or a URL to create one from on first use.
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self._client = client
+        self._script = None
+        self._lock = threading.Lock()
+        # Used while Redis is unreachable, so an outage degrades to per-process limits
+        # rather than to no limit at all.
+        self._fallback = TokenBucket(rate, burst)
+        self._retry_at = 0.0
+
+    def _reserve_script(self):
+        with self._lock:
+            if self._script is None:
+                client = self._client
+                if isinstance(client, str):
+                    import redis
+                    client = redis.from_url(client)
+                self._script = client.register_script(RESERVE_SCRIPT)
+                self._client = client
+            return self._script
+
+    def reserve(self, max_wait):
+        if time.monotonic() < self._retry_at:
+            return self._fallback.reserve(max_wait)
+        try:
+            granted, wait = self._reserve_script()(keys=[self.key], args=[self.rate, self.burst, max_wait])
+        except Exception as e:
+            self._retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+            log.warning(f"Shared upstream budget unavailable for {REDIS_RETRY_INTERVAL}s, using local bucket: {e}")
+            return self._fallback.reserve(max_wait)
+        wait = float(wait)
+        return (wait if int(granted) else None), wait
+
+
+def make_budget(scraper_cfg, redis_url=None):
+    rate = scraper_cfg.get("upstream_rate", DEFAULT_UPSTREAM_RATE)
+    if not rate:
+        return None
+    burst = scraper_cfg.get("upstream_burst", DEFAULT_UPSTREAM_BURST)
+
+    if redis_url:
+        if importlib.util.find_spec("redis") is not None:
+            # Connects on the first reservation.
+            return RedisTokenBucket(redis_url, rate, burst)
+        log.warning("Could not set up shared upstream budget, using local bucket: the redis package is not installed")
+    return TokenBucket(rate, burst)
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+from src.logger import log
+
+DEFAULT_REFRESH_RATE = 6
+DEFAULT_MAX_PENDING = 1000
+
+class RefreshScheduler:
+    """Re-scrapes soft-expired cache entries in the background, most-requested first.
+
+    Callers submit() every stale hit; repeated hits raise the entry's priority. The
+    worker takes at most ``rate`` entries per minute, so a burst of stale reads never
+    turns into a burst of upstream requests.
+    """
+
+    def __init__(self, rate=DEFAULT_REFRESH_RATE, max_pending=DEFAULT_MAX_PENDING):
+        self.rate = rate
+        self.max_pending = max_pending
+        self.stats = {"submitted": 0, "refreshed": 0, "failed": 0, "dropped": 0}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task = None
+        self._thread = None
+
+    @property
+    def interval(self):
+        return 60.0 / self.rate
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, url, game=None):
+        if not self.rate:
+            return
+        with self._lock:
+            hits, _ = self._pending.get(url, (0, None))
+            if not hits and len(self._pending) >= self.max_pending:
+                # Full queue: make room by dropping the least requested entry.
+                coldest = min(self._pending, key=lambda key: self._pending[key][0])
+                self._pending.pop(coldest)
+                self.stats["dropped"] += 1
+            self._pending[url] = (hits + 1, game)
+            self.stats["submitted"] += 1
+
+    def pop(self):
+        with self._lock:
+            if not self._pending:
+                return None
+            url = max(self._pending, key=lambda key: self._pending[key][0])
+            _, game = self._pending.pop(url)
+            return url, game
+
+    def _done(self, url, ok):
+        self.stats["refreshed" if ok else "failed"] += 1
+        if not ok:
+            log.debug(f"Background refresh found nothing for {url}; keeping the cached entry.")
+
+    async def run(self, refresh):
+        while not self._stop.is_set():
+            await asyncio.sleep(self.interval)
+            item = self.pop()
+            if not item:
+                continue
+            try:
+                self._done(item[0], await refresh(*item))
+            except Exception as e:
+                self.stats["failed"] += 1
+                log.warning(f"Background refresh failed for {item[0]}: {e}")
+
+    def start_async(self, refresh):
+        if self.rate and self._task is None:
+            self._task = asyncio.ensure_future(self.run(refresh))
+        return self._task
+
+    def start(self, refresh):
+        if not self.rate or self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                item = self.pop()
+                if not item:
+                    continue
+                try:
+                    self._done(item[0], refresh(*item))
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    log.warning(f"Background refresh failed for {item[0]}: {e}")
+
+        self._thread = threading.Thread(target=loop, name="cache-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
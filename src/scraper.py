@@ -1,15 +1,23 @@
-import re
+import asyncio
 import urllib.parse
+import json
 import os
-from curl_cffi import requests
-from bs4 import BeautifulSoup
+import time
+import threading
 
 from src.logger import log
 
 from src.func.extract_link import extract_links, extract_grouped_links
-from src.func.get_proxy import get_proxy
-from src.func.parse import parse_metadata
-from src.func.search import search_games as func_search_games
+from src.proxy_pool import ProxyPool, proxy_dict, DEFAULT_COOLDOWN, DEFAULT_MAX_COOLDOWN, DEFAULT_REVALIDATE_INTERVAL, DEFAULT_WARM_BONUS
+from src.func.pages import parse_game_page, parse_dl_page
+from src.func.soup import resolve_parser, make_soup
+from src.func.search import search_url, parse_search_page, dedupe_results, DEFAULT_SEARCH_PAGES
+from src.metrics import stage, record_upstream, BUDGET_REJECTED
+from src.rate_budget import BudgetExceeded, make_budget, DEFAULT_UPSTREAM_MAX_WAIT
+from src.deadline import DeadlineExceeded, cap
+from src.func.latency import LatencyWindow
+from src.session_pool import SessionPool, DEFAULT_IDLE_TIMEOUT
+from src.page_store import Page, PageStore, DEFAULT_PAGE_STORE_FILE, DEFAULT_PAGE_STORE_MAX_AGE
 
 try:
     from src.config import cfg
@@ -24,37 +32,313 @@ DEFAULT_IGNORE_DOMAINS = [
     "wp.com", "google.com"
 ]
 DEFAULT_TIMEOUT = 30
+DEFAULT_PROXY_RETRIES = 2
+DEFAULT_TIMEOUT_MIN = 2.0
+DEFAULT_TIMEOUT_FACTOR = 3.0
+DEFAULT_LATENCY_WINDOW = 200
+DEFAULT_HEDGE_QUANTILE = 0.9
+DEFAULT_MAX_HEDGES = 1
+LATENCY_MIN_SAMPLES = 20
+
+def is_proxy_fault(exc):
+    # An upstream 404/410 came back through a working proxy; blocks and 5xx count against it.
+    from curl_cffi.requests.exceptions import HTTPError
+    if not isinstance(exc, HTTPError):
+        return True
+    status = getattr(exc.response, "status_code", None)
+    return status is None or status in (403, 407, 429) or status >= 500
+
+def failure_class(exc):
+    # Buckets a failed scrape for the negative cache: the page is gone, it was slow,
+    # or anything else. None when the failure says nothing about the page.
+    if isinstance(exc, (BudgetExceeded, DeadlineExceeded)):
+        return None
+    from curl_cffi.requests.exceptions import HTTPError, Timeout
+    if isinstance(exc, HTTPError):
+        if getattr(exc.response, "status_code", None) in (404, 410):
+            return "not_found"
+    # asyncio.TimeoutError (from wait_for around streamed reads) is only the builtin
+    # TimeoutError from Python 3.11 on.
+    if isinstance(exc, (Timeout, TimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    return "error"
+
+def new_metadata(current_size="N/A"):
+    # Every field the page extractors fill in; they expect all of them present.
+    return {
+        "size": current_size,
+        "version": "N/A",
+        "region": "N/A",
+        "password": "N/A",
+        "firmware": "N/A",
+        "voice": "N/A",
+        "subtitles": "N/A",
+        "cusa": "N/A"
+    }
 
 class PSScraper:
     def __init__(self):
-        self.scraper = requests.Session()
         scraper_cfg = getattr(cfg, "scraper", {}) if cfg else {}
+        self.scraper_cfg = scraper_cfg
         self.base_url = scraper_cfg.get("base_url", DEFAULT_BASE_URL)
         self.ignore_domains = scraper_cfg.get("ignore_domains", DEFAULT_IGNORE_DOMAINS)
         self.timeout = scraper_cfg.get("timeout", DEFAULT_TIMEOUT)
+        self.parser = resolve_parser(scraper_cfg.get("parser", "auto"))
+        self.search_mode = scraper_cfg.get("search_mode", "upstream")
+        self.sessions = SessionPool(self._new_session, scraper_cfg.get("session_idle_timeout", DEFAULT_IDLE_TIMEOUT))
+
+        # The proxy list is read and the pool built on first use, so constructing a
+        # scraper (and importing the API) stays cheap.
+        self._proxy_pool = None
+        self._proxy_lock = threading.Lock()
+        self._revalidate = False
+        self.proxy_retries = scraper_cfg.get("proxy_retries", DEFAULT_PROXY_RETRIES)
+        self.direct_fallback = scraper_cfg.get("direct_fallback", True)
+        self.budget = make_budget(scraper_cfg, os.getenv("REDIS_URL"))
+        self.budget_max_wait = scraper_cfg.get("upstream_max_wait", DEFAULT_UPSTREAM_MAX_WAIT)
+        self.latency = LatencyWindow(scraper_cfg.get("latency_window", DEFAULT_LATENCY_WINDOW))
+        self.timeout_min = scraper_cfg.get("timeout_min", DEFAULT_TIMEOUT_MIN)
+        self.timeout_factor = scraper_cfg.get("timeout_factor", DEFAULT_TIMEOUT_FACTOR)
+        self.hedge_quantile = scraper_cfg.get("hedge_quantile", DEFAULT_HEDGE_QUANTILE)
+        self.max_hedges = scraper_cfg.get("max_hedges", DEFAULT_MAX_HEDGES)
+        page_store = scraper_cfg.get("page_store", DEFAULT_PAGE_STORE_FILE)
+        self.pages = PageStore(
+            page_store, scraper_cfg.get("page_store_max_age", DEFAULT_PAGE_STORE_MAX_AGE)
+        ) if page_store else None
+
+    def warm_up(self):
+        # Pays the deferred costs (HTTP client, HTML parser, proxy list) ahead of the
+        # first request; meant to run in the background after startup.
+        import curl_cffi.requests  # noqa: F401
+        make_soup(b"", self.parser)
+        return self.proxy_pool
+
+    def _load_proxies(self):
+        proxies = []
+        proxy_file = self.scraper_cfg.get("proxy_file", "proxy.txt")
 
-        self.proxies = []
-        proxy_file = scraper_cfg.get("proxy_file", "proxy.txt")
-        
         if proxy_file and os.path.exists(proxy_file):
             try:
                 with open(proxy_file, "r", encoding="utf-8") as f:
-                    self.proxies = [line.strip() for line in f if line.strip()]
-                log.info(f"Loaded {len(self.proxies)} proxies from {proxy_file}")
+                    proxies = [line.strip() for line in f if line.strip()]
+                log.info(f"Loaded {len(proxies)} proxies from {proxy_file}")
             except Exception as e:
                 log.error(f"Failed to load proxies from {proxy_file}: {e}")
         elif os.path.exists("proxy.txt"):
             try:
                 with open("proxy.txt", "r", encoding="utf-8") as f:
-                    self.proxies = [line.strip() for line in f if line.strip()]
-                log.info(f"Loaded {len(self.proxies)} proxies from proxy.txt")
+                    proxies = [line.strip() for line in f if line.strip()]
+                log.info(f"Loaded {len(proxies)} proxies from proxy.txt")
             except Exception as e:
                 log.error(f"Failed to load proxies from proxy.txt: {e}")
         else:
             log.warning(f"No proxy file found (checked '{proxy_file}' and 'proxy.txt'). Using local IP.")
+        return proxies
+
+    @property
+    def proxy_pool(self):
+        if self._proxy_pool is None:
+            with self._proxy_lock:
+                if self._proxy_pool is None:
+                    pool = ProxyPool(
+                        self._load_proxies(),
+                        cooldown=self.scraper_cfg.get("proxy_cooldown", DEFAULT_COOLDOWN),
+                        max_cooldown=self.scraper_cfg.get("proxy_max_cooldown", DEFAULT_MAX_COOLDOWN),
+                        warm_bonus=self.scraper_cfg.get("warm_route_bonus", DEFAULT_WARM_BONUS),
+                    )
+                    self._proxy_pool = pool
+                    if self._revalidate:
+                        self._start_revalidation(pool)
+        return self._proxy_pool
+
+    @proxy_pool.setter
+    def proxy_pool(self, pool):
+        self._proxy_pool = pool
+
+    def _new_session(self, proxy_url):
+        from curl_cffi import requests
+        return requests.Session(impersonate="chrome", proxies=proxy_dict(proxy_url))
+
+    def start_proxy_revalidation(self):
+        # Takes effect once the pool exists; it is not built just to start the thread.
+        with self._proxy_lock:
+            self._revalidate = True
+            pool = self._proxy_pool
+        if pool is not None:
+            self._start_revalidation(pool)
+
+    def _start_revalidation(self, pool):
+        from curl_cffi import requests
+        probe_url = self.scraper_cfg.get("proxy_probe_url") or self.base_url
+        interval = self.scraper_cfg.get("proxy_revalidate_interval", DEFAULT_REVALIDATE_INTERVAL)
+
+        def probe(proxy_url):
+            requests.get(
+                probe_url, timeout=self.timeout, impersonate="chrome", proxies=proxy_dict(proxy_url)
+            ).raise_for_status()
 
-    def search_games(self, query):
-        return func_search_games(self.scraper, self.base_url, self.timeout, self.proxies, query)
+        pool.start_revalidation(probe, interval)
+
+    def _direct_allowed(self):
+        # With proxies configured and direct_fallback off, requests never go out on
+        # the server's own IP, not even while every proxy is cooling down.
+        return self.direct_fallback or not len(self.proxy_pool)
+
+    def _before_direct(self, label, tried):
+        if not self._direct_allowed():
+            if tried:
+                raise RuntimeError(f"{label}: all {len(tried)} proxy attempts failed")
+            raise RuntimeError(f"{label}: no proxy available")
+        if tried:
+            log.warning(f"{label} proxies failed. Retrying direct connection...")
+
+    def adaptive_timeout(self):
+        # timeout_factor x the observed p99, within [timeout_min, timeout]; the
+        # configured timeout until there are enough samples.
+        if self.timeout_factor and len(self.latency) >= LATENCY_MIN_SAMPLES:
+            return min(self.timeout, max(self.timeout_min, self.timeout_factor * self.latency.quantile(0.99)))
+        return self.timeout
+
+    def hedge_delay(self):
+        # How long an attempt may run before a duplicate goes out on another route.
+        if not self.hedge_quantile or not self.max_hedges or len(self.latency) < LATENCY_MIN_SAMPLES:
+            return None
+        return self.latency.quantile(self.hedge_quantile)
+
+    def _observe(self, started, limit, timeout, exc=None):
+        if exc is None:
+            self.latency.add(time.perf_counter() - started)
+        elif failure_class(exc) == "timeout":
+            if timeout < limit:
+                # Cut short by the request deadline, not by a slow upstream.
+                raise DeadlineExceeded() from exc
+            # Counted at the limit, so a slowing upstream raises the adaptive timeout
+            # instead of timing out at the old one for good.
+            self.latency.add(timeout)
+
+    def _spend_budget(self):
+        if self.budget is None:
+            return
+        wait, needed = self.budget.reserve(cap(self.budget_max_wait))
+        if wait is None:
+            BUDGET_REJECTED.inc()
+            raise BudgetExceeded(needed)
+        if wait:
+            with stage("budget_wait"):
+                time.sleep(wait)
+
+    def _get(self, url, proxy_url, headers=None):
+        for session in self.sessions.evict_idle():
+            session.close()
+        limit = self.adaptive_timeout()
+        timeout = cap(limit)
+        started = time.perf_counter()
+        with self.sessions.use(proxy_url) as session:
+            try:
+                resp = session.get(url, timeout=timeout, headers=headers)
+            except Exception as e:
+                record_upstream("error", proxy_url is not None)
+                self._observe(started, limit, timeout, e)
+                raise
+        self._observe(started, limit, timeout)
+        self.sessions.record(proxy_url, resp)
+        record_upstream(resp.status_code, proxy_url is not None)
+        resp.raise_for_status()
+        return resp
+
+    def _fetch(self, url, label, headers=None):
+        tried = []
+        for _ in range(self.proxy_retries + 1):
+            proxy_url = self.proxy_pool.acquire(exclude=tried, prefer=self.sessions.warm())
+            if not proxy_url:
+                break
+            tried.append(proxy_url)
+            log.debug(f"{label} Proxy: {proxy_url}")
+            self._spend_budget()
+
+            started = time.perf_counter()
+            try:
+                resp = self._get(url, proxy_url, headers)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if not is_proxy_fault(e):
+                    self.proxy_pool.report_success(proxy_url, time.perf_counter() - started)
+                    raise
+                self.proxy_pool.report_failure(proxy_url)
+                continue
+
+            self.proxy_pool.report_success(proxy_url, time.perf_counter() - started)
+            return resp
+
+        self._before_direct(label, tried)
+        self._spend_budget()
+        return self._get(url, None, headers)
+
+    def _fetch_page(self, url, label):
+        # A page seen before is revalidated with its stored ETag/Last-Modified.
+        if self.pages is None:
+            return Page(url, self._fetch(url, label).content)
+        known = self.pages.get(url)
+        resp = self._fetch(url, label, self.pages.conditional(known))
+        return self.pages.record(url, known, resp)
+
+    def _reuse(self, page, fn, given):
+        if not isinstance(page, Page) or not page.unchanged:
+            return None
+        kept = page.parsed.get(fn.__name__)
+        if kept is None or kept["input"] != given:
+            return None
+        self.pages.stats["reused"] += 1
+        return kept["output"]
+
+    def _parse_page(self, page, fn, *args):
+        """fn(content, *args) for a page from _fetch_page() (or plain bytes). If the
+        page is unchanged and fn already ran on it with the same args, its stored
+        output is returned instead, so callers take metadata from the output rather
+        than from the dict they passed in."""
+        if not isinstance(page, Page):
+            return fn(page, *args)
+        given = json.dumps(args, sort_keys=True)
+        output = self._reuse(page, fn, given)
+        if output is None:
+            output = fn(page.content, *args)
+            if self.pages is not None:
+                self.pages.stats["parsed"] += 1
+                self.pages.save_parsed(page, fn.__name__, given, output)
+        return output
+
+    def search_page(self, query, page=1):
+        """(results, last_page) of one result page; ([], None) when it cannot be read."""
+        try:
+            with stage("search_fetch"):
+                fetched = self._fetch_page(search_url(self.base_url, query, page), f"Search p{page}" if page > 1 else "Search")
+        except Exception as e:
+            # Past the end of the results WordPress answers 404.
+            if page == 1 or failure_class(e) != "not_found":
+                log.error(f"Search failed: {e}")
+            return [], None
+
+        with stage("search_parse"):
+            return self._parse_page(fetched, parse_search_page, self.parser)
+
+    def search_games(self, query, pages=None):
+        """Results from the first ``pages`` (scraper.search_pages) result pages, in
+        page order and de-duplicated. Stops at the last page, an empty page or a
+        failed fetch, keeping what it has."""
+        pages = pages or self.scraper_cfg.get("search_pages", DEFAULT_SEARCH_PAGES)
+        results = []
+        for number in range(1, pages + 1):
+            found, last = self.search_page(query, number)
+            if not found:
+                break
+            results.extend(found)
+            if last is not None and number >= last:
+                break
+
+        results = dedupe_results(results)
+        log.info(f"Search for '{query}' returned {len(results)} results.")
+        return results
 
     def _extract_links(self, soup):
         return extract_links(soup, self.ignore_domains)
@@ -62,86 +346,63 @@ class PSScraper:
     def _extract_grouped_links(self, soup):
         return extract_grouped_links(soup, self.ignore_domains)
 
-    def get_game_links(self, game_url, current_size="N/A"):
-        metadata = {
-            "size": current_size,
-            "version": "N/A",
-            "region": "N/A",
-            "password": "N/A",
-            "firmware": "N/A",
-            "voice": "N/A",
-            "subtitles": "N/A",
-            "cusa": "N/A"
-        }
-
-        proxy = get_proxy(self.proxies)
-        if proxy:
-            log.debug(f"Using Proxy: {proxy.get('https')}")
+    def _new_metadata(self, current_size):
+        return new_metadata(current_size)
 
-        try:
-            resp = self.scraper.get(game_url, timeout=self.timeout, impersonate="chrome", proxies=proxy)
-            resp.raise_for_status()
-        except Exception as e:
-            if proxy:
-                failed_proxy_url = proxy.get('https')
-                if failed_proxy_url in self.proxies:
-                    self.proxies.remove(failed_proxy_url)
-                    log.warning(f"Proxy died ({failed_proxy_url}). Removed. {len(self.proxies)} left.")
-                
-                log.warning("Retrying direct connection...")
-                try:
-                    resp = self.scraper.get(game_url, timeout=self.timeout, impersonate="chrome", proxies=None)
-                    resp.raise_for_status()
-                except Exception as final_e:
-                    log.error(f"Link extract failed (Direct): {final_e}")
-                    return [], metadata
-            else:
-                log.error(f"Link extract failed: {e}")
-                return [], metadata
+    def _parse_game_page(self, content, metadata):
+        parsed, page_links, dl_url = self._parse_page(content, parse_game_page, metadata, self.parser, self.ignore_domains)
+        metadata.update(parsed)
+        return page_links, dl_url
 
-        soup = BeautifulSoup(resp.content, "html.parser")
-        parse_metadata(soup, metadata)
+    def _parse_dl_page(self, content, metadata):
+        parsed, links = self._parse_page(content, parse_dl_page, metadata, self.parser, self.ignore_domains)
+        metadata.update(parsed)
+        return links
 
-        dl_node = soup.find("a", href=re.compile(r"dll-")) or \
-                  soup.select_one("a:has(img[alt*='Download'])")
+    def links_from_game_page(self, content, current_size="N/A"):
+        metadata = self._new_metadata(current_size)
+        page_links, dl_url = self._parse_game_page(content, metadata)
 
-        if dl_node:
+        if dl_url:
             try:
-                dl_url = dl_node["href"]
-                dl_proxy = get_proxy(self.proxies)
-                if dl_proxy:
-                    log.debug(f"Using Proxy for DL Page: {dl_proxy.get('https')}")
-
-                try:
-                    dl_resp = self.scraper.get(
-                        dl_url,
-                        timeout=self.timeout,
-                        impersonate="chrome",
-                        proxies=dl_proxy
-                    )
-                    dl_resp.raise_for_status()
-                except Exception:
-                    if dl_proxy:
-                        failed_dl_proxy = dl_proxy.get('https')
-                        if failed_dl_proxy in self.proxies:
-                            self.proxies.remove(failed_dl_proxy)
-                            log.warning(f"DL Proxy died. Removed. {len(self.proxies)} left.")
-                        
-                        log.warning("DL proxy failed. Retrying direct...")
-                        dl_resp = self.scraper.get(dl_url, timeout=self.timeout, impersonate="chrome", proxies=None)
-                        dl_resp.raise_for_status()
-                    else:
-                        raise
-
-                dl_soup = BeautifulSoup(dl_resp.content, "html.parser")
-                parse_metadata(dl_soup, metadata)
-                final_links = self._extract_grouped_links(dl_soup)
+                with stage("dl_page_fetch"):
+                    dl_page = self._fetch_page(dl_url, "DL page")
+                final_links = self._parse_dl_page(dl_page, metadata)
 
                 if final_links:
                     return final_links, metadata
+            except (BudgetExceeded, DeadlineExceeded) as e:
+                log.warning(f"DL Page fetch aborted: {e}")
+                metadata["aborted"] = True
+                return [], metadata
             except Exception as e:
                 log.warning(f"DL Page extract failed: {e}")
-                pass
 
-        final_links = self._extract_grouped_links(soup)
-        return final_links, metadata
\ No newline at end of file
+        return page_links, metadata
+
+    def get_game_links(self, game_url, current_size="N/A"):
+        """(links, metadata). Without links, metadata["failure"] is the failure class
+        of the fetch, or metadata["aborted"] is set when the scrape was refused by the
+        upstream budget or ran out of time; that says nothing about the page."""
+        try:
+            with stage("game_page_fetch"):
+                page = self._fetch_page(game_url, "Game page")
+        except Exception as e:
+            log.error(f"Link extract failed: {e}")
+            metadata = self._new_metadata(current_size)
+            failure = failure_class(e)
+            if failure:
+                metadata["failure"] = failure
+            else:
+                metadata["aborted"] = True
+            return [], metadata
+
+        return self.links_from_game_page(page, current_size)
+
+    def close(self):
+        if self._proxy_pool is not None:
+            self._proxy_pool.stop()
+        if self.pages is not None:
+            self.pages.close()
+        for session in self.sessions.close_all():
+            session.close()
@@ -0,0 +1,186 @@
+import json
+import os
+from difflib import SequenceMatcher
+import re
+import sqlite3
+import threading
+
+from src.func.search import normalize_query
+
+ID_RE = re.compile(r'((?:CUSA|PPSA)\d{5})', re.IGNORECASE)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """Local SQLite FTS5 index over cached games (title, CUSA/PPSA IDs, region, version)."""
+
+    def __init__(self, path, fuzzy_threshold=0.7):
+        self.path = path
+        self.fuzzy_threshold = fuzzy_threshold
+        self.has_trigram = False
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self):
+        if self._conn is not None:
+            return
+
+        dirpath = os.path.dirname(self.path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "rowid INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, cusa TEXT, result TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5("
+            "title, cusa, region, version, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS games_trigram USING fts5("
+                "title, tokenize='trigram')"
+            )
+            self.has_trigram = True
+        except sqlite3.OperationalError:
+            # SQLite < 3.34 has no trigram tokenizer; fuzzy matching is then skipped.
+            self.has_trigram = False
+
+    def count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def add(self, entry):
+        metadata = entry.get("metadata", {})
+        title = entry.get("title") or metadata.get("title") or ""
+        cusa = metadata.get("cusa", "N/A")
+        region = metadata.get("region", "N/A")
+        version = metadata.get("version", "N/A")
+        result = {
+            "title": title,
+            "url": entry["url"],
+            "image": entry.get("image"),
+            "downloads": entry.get("downloads", "N/A"),
+            "size": metadata.get("size", entry.get("size", "N/A")),
+            "region": region,
+            "cusa": cusa,
+            "version": version,
+        }
+
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN")
+            try:
+                row = db.execute("SELECT rowid FROM games WHERE url = ?", (entry["url"],)).fetchone()
+                if row:
+                    rowid = row[0]
+                    db.execute("DELETE FROM games_fts WHERE rowid = ?", (rowid,))
+                    if self.has_trigram:
+                        db.execute("DELETE FROM games_trigram WHERE rowid = ?", (rowid,))
+                    db.execute(
+                        "UPDATE games SET cusa = ?, result = ? WHERE rowid = ?",
+                        (cusa, json.dumps(result), rowid),
+                    )
+                else:
+                    rowid = db.execute(
+                        "INSERT INTO games (url, cusa, result) VALUES (?, ?, ?)",
+                        (entry["url"], cusa, json.dumps(result)),
+                    ).lastrowid
+
+                db.execute(
+                    "INSERT INTO games_fts (rowid, title, cusa, region, version) VALUES (?, ?, ?, ?, ?)",
+                    (rowid, title, cusa, region, version),
+                )
+                if self.has_trigram:
+                    db.execute("INSERT INTO games_trigram (rowid, title) VALUES (?, ?)", (rowid, title))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def rebuild(self, entries):
+        count = 0
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get("url") and entry.get("links"):
+                self.add(entry)
+                count += 1
+        return count
+
+    def _rows(self, sql, params):
+        with self._lock:
+            return [json.loads(r[0]) for r in self._db().execute(sql, params).fetchall()]
+
+    def search(self, query, limit=20):
+        query = normalize_query(query)
+        if not query:
+            return []
+
+        ids = [m.upper() for m in ID_RE.findall(query)]
+        if ids:
+            results = []
+            for mid in ids:
+                results.extend(self._rows(
+                    "SELECT result FROM games WHERE cusa LIKE ? LIMIT ?", (f"%{mid}%", limit)
+                ))
+            return list({r["url"]: r for r in results}.values())[:limit]
+
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+
+        match = " AND ".join(f'"{t}"*' for t in tokens)
+        results = self._rows(
+            "SELECT g.result FROM games_fts f JOIN games g ON g.rowid = f.rowid "
+            "WHERE games_fts MATCH ? ORDER BY f.rank LIMIT ?",
+            (match, limit),
+        )
+        if results or not self.has_trigram:
+            return results
+
+        return self._fuzzy(query, limit)
+
+    def _fuzzy(self, query, limit):
+        grams = {g for g in trigrams(query) if " " not in g}
+        if not grams:
+            return []
+
+        match = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+        candidates = self._rows(
+            "SELECT g.result FROM games_trigram t JOIN games g ON g.rowid = t.rowid "
+            "WHERE games_trigram MATCH ? ORDER BY t.rank LIMIT ?",
+            (match, limit * 5),
+        )
+
+        # Trigrams only select candidates; each query word is then scored against its
+        # closest title word so a single typo does not sink the match.
+        words = TOKEN_RE.findall(query)
+        scored = []
+        for result in candidates:
+            title_words = TOKEN_RE.findall(result["title"].lower())
+            if not title_words:
+                continue
+            score = sum(
+                max(SequenceMatcher(None, w, t).ratio() for t in title_words) for w in words
+            ) / len(words)
+            if score >= self.fuzzy_threshold:
+                scored.append((score, result))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [result for _, result in scored[:limit]]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
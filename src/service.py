@@ -0,0 +1,561 @@
+import asyncio
+import math
+from contextlib import aclosing, contextmanager
+from urllib.parse import urlparse
+
+from src.func.singleflight import SingleFlight
+from src.func.search import normalize_query, dedupe_results, DEFAULT_SEARCH_PAGES
+from src.metrics import proxy_label
+from src.rate_budget import BudgetExceeded
+from src.deadline import DeadlineExceeded, deadline, unbounded
+from src.logger import log, log_stats
+
+DEFAULT_SEARCH_MAX_PAGES = 10
+
+def _discard(task):
+    if task.done():
+        if not task.cancelled():
+            task.exception()
+    else:
+        task.cancel()
+
+def _failed(links, metadata):
+    return not links and (metadata.get("size") == "N/A" or "failure" in metadata)
+
+def _link_groups(links):
+    groups = {}
+    for link in links:
+        groups.setdefault(link.get("group", ""), []).append(link)
+    for group, items in groups.items():
+        yield {"type": "links", "group": group, "links": items}
+
+
+class ScrapeService:
+    def __init__(self, scraper, db, prefetch_top_n=0, prefetch_concurrency=2, prefetch_budget=30, refresher=None,
+                 search_pages=DEFAULT_SEARCH_PAGES, search_max_pages=DEFAULT_SEARCH_MAX_PAGES):
+        self.scraper = scraper
+        self.db = db
+        self.search_pages = search_pages
+        self.search_max_pages = max(search_max_pages, search_pages)
+        self.refresher = refresher
+        self.flight = SingleFlight()
+        self._watchers = {}
+        self._history = {}
+        self._background = set()
+        self.prefetch_top_n = prefetch_top_n
+        self.prefetch_budget = prefetch_budget
+        self._prefetch_limit = asyncio.Semaphore(prefetch_concurrency)
+        self.prefetch_stats = {"started": 0, "cached": 0, "skipped": 0, "negative": 0}
+
+    def _spawn(self, coro):
+        # Background work is not bound by the deadline of the request that started it.
+        task = asyncio.ensure_future(unbounded(coro))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    @contextmanager
+    def _publishing(self, key):
+        # Keeps the events a running scrape has published, for callers that join late.
+        events = self._history[key] = []
+        try:
+            yield
+        finally:
+            if self._history.get(key) is events:
+                del self._history[key]
+
+    def _publish(self, key, kind, value):
+        events = self._history.get(key)
+        if events is not None:
+            events.append((kind, value))
+        for queue in self._watchers.get(key, ()):
+            queue.put_nowait((kind, value))
+
+    async def _follow(self, key, fn):
+        """Joins (or starts) the single-flight for ``key`` and yields the progress
+        events its scrape publishes, then ("done", result). A caller that joins late
+        first gets the events published before it arrived."""
+        queue = asyncio.Queue()
+        for event in self._history.get(key, ()):
+            queue.put_nowait(event)
+        watchers = self._watchers.setdefault(key, set())
+        watchers.add(queue)
+        task = asyncio.ensure_future(self.flight.do(key, fn))
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait((getter, task), return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                yield getter.result()
+            while not queue.empty():
+                yield queue.get_nowait()
+            yield "done", task.result()
+        finally:
+            watchers.discard(queue)
+            if not watchers and self._watchers.get(key) is watchers:
+                del self._watchers[key]
+            if getter is not None:
+                getter.cancel()
+            # Only this caller's wait is cancelled; the shared scrape keeps running.
+            _discard(task)
+
+    def _lookup(self, url):
+        # One thread hop for both tiers; the negative cache is only consulted on a miss.
+        cached = self.db.get(url)
+        return cached, None if cached else self.db.get_negative(url)
+
+    def _negative_result(self, negative):
+        metadata = self.scraper._new_metadata("N/A")
+        metadata["failure"] = negative["failure"]
+        return [], metadata
+
+    async def get_details(self, url, title=None):
+        cached, negative = await asyncio.to_thread(self._lookup, url)
+        if cached:
+            self._check_stale(url, cached)
+            return cached["links"], cached.get("metadata", {"size": cached.get("size", "N/A")})
+        if negative:
+            return self._negative_result(negative)
+
+        return await self.flight.do(("details", url), lambda: self._scrape_details(url, title))
+
+    def _check_stale(self, url, cached):
+        if self.refresher is not None and self.db.is_stale(cached):
+            # Keep the listing fields (title, image, ...) that a details scrape cannot see.
+            game = {k: cached.get(k) for k in ("title", "image", "downloads") if cached.get(k) is not None}
+            self.refresher.submit(url, game)
+
+    def start_refresher(self):
+        if self.refresher is not None:
+            self.refresher.start_async(self._refresh)
+
+    async def _refresh(self, url, game):
+        links, _ = await self.flight.do(("details", url), lambda: self._scrape_details(url, game=game))
+        return bool(links)
+
+    async def _scrape_details(self, url, title=None, game=None):
+        key = ("details", url)
+        links, metadata = [], self.scraper._new_metadata("N/A")
+        with self._publishing(key):
+            async for kind, value in self.scraper.iter_game_links(url, "N/A"):
+                if kind == "metadata":
+                    metadata = value
+                    self._publish(key, "metadata", dict(value))
+                elif kind == "failure":
+                    metadata["failure"] = value
+                else:
+                    links = value
+            if links:
+                game = dict(game or {}, url=url)
+                game["title"] = title or game.get("title") or metadata.get("title", "N/A")
+                try:
+                    await asyncio.to_thread(self.db.save, game, links, metadata)
+                except Exception as e:
+                    log.warning(f"Cache write failed for {url}: {e}")
+            else:
+                metadata.setdefault("failure", "no_links")
+                try:
+                    await asyncio.to_thread(self.db.save_negative, url, metadata["failure"])
+                except Exception as e:
+                    log.warning(f"Negative cache write failed for {url}: {e}")
+            return links, metadata
+
+    async def iter_details(self, url):
+        """Streaming variant of get_details(): yields {"type": "metadata"} as soon as
+        the game page is parsed, one {"type": "links"} per link group once the DL page
+        is, then {"type": "done"}. Scrape failures end with {"type": "error"}."""
+        cached, negative = await asyncio.to_thread(self._lookup, url)
+        if negative:
+            yield {"type": "error", "status": 404, "detail": "No content found or scraping failed", "failure": negative["failure"]}
+            return
+        if cached:
+            self._check_stale(url, cached)
+            metadata = cached.get("metadata", {"size": cached.get("size", "N/A")})
+            yield {"type": "metadata", "metadata": metadata}
+            for event in _link_groups(cached["links"]):
+                yield event
+            yield {"type": "done", "cached": True, "count": len(cached["links"])}
+            return
+
+        sent = None
+        async for kind, value in self._follow(("details", url), lambda: self._scrape_details(url)):
+            if kind == "metadata":
+                sent = value
+                yield {"type": "metadata", "metadata": value}
+                continue
+            links, metadata = value
+            if _failed(links, metadata):
+                yield {"type": "error", "status": 404, "detail": "No content found or scraping failed", "failure": metadata.get("failure")}
+                return
+            if metadata != sent:
+                # The DL page can fill in fields the game page lacked.
+                yield {"type": "metadata", "metadata": metadata}
+            for event in _link_groups(links):
+                yield event
+            yield {"type": "done", "cached": False, "count": len(links)}
+
+    async def iter_details_batch(self, urls, concurrency=8, per_host=4, item_deadline=None):
+        urls = list(dict.fromkeys(u for u in urls if u))
+        pending = []
+
+        for url in urls:
+            cached, negative = await asyncio.to_thread(self._lookup, url)
+            if cached:
+                self._check_stale(url, cached)
+                metadata = cached.get("metadata", {"size": cached.get("size", "N/A")})
+                yield {"url": url, "cached": True, "metadata": metadata, "links": cached["links"]}
+            elif negative:
+                yield {"url": url, "cached": True, "error": "No content found or scraping failed", "failure": negative["failure"]}
+            else:
+                pending.append(url)
+
+        if not pending:
+            return
+
+        limit = asyncio.Semaphore(concurrency)
+        host_limits = {}
+
+        async def scrape(url):
+            host = urlparse(url).netloc
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            async with host_limit, limit:
+                try:
+                    with deadline(item_deadline):
+                        links, metadata = await self.flight.do(("details", url), lambda: self._scrape_details(url))
+                except Exception as e:
+                    return {"url": url, "error": str(e)}
+            if _failed(links, metadata):
+                return {"url": url, "error": "No content found or scraping failed", "failure": metadata.get("failure")}
+            return {"url": url, "cached": False, "metadata": metadata, "links": links}
+
+        tasks = [asyncio.ensure_future(scrape(url)) for url in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _search_key(self, query, page):
+        return ("search", normalize_query(query), page)
+
+    async def search(self, query, limit=None, offset=0):
+        """Returns (results, next_offset). Without ``limit`` it answers with the first
+        ``search_pages`` result pages (past ``offset``, that many pages' worth of
+        results); with it, it reads as many pages as the window needs (up to
+        ``search_max_pages``). next_offset is None when there is no more."""
+        results = []
+        async for event in self.iter_search(query, limit, offset):
+            if event["type"] == "result":
+                results.append(event["result"])
+            else:
+                return results, event["next_offset"]
+
+    async def iter_search(self, query, limit=None, offset=0):
+        """Streaming variant of search(): one {"type": "result"} per card as it is
+        parsed, then {"type": "done", "count", "next_offset"}."""
+        want = None if limit is None else offset + limit + 1
+        sent, skipped, more = [], 0, False
+        walk = {"more": False}
+        async with aclosing(self._iter_results(query, want, offset, walk)) as results:
+            async for result in results:
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if limit is not None and len(sent) >= limit:
+                    more = True
+                    break
+                sent.append(result)
+                yield {"type": "result", "result": result}
+        if limit is None:
+            more = walk["more"]
+
+        self.prefetch(sent)
+        yield {"type": "done", "count": len(sent), "next_offset": offset + len(sent) if more else None}
+
+    async def _iter_results(self, query, want=None, skip=0, walk=None):
+        # De-duplicated results in page order: pages 1..search_pages, or as many pages
+        # (up to search_max_pages) as it takes to collect ``want`` results. Sets
+        # walk["more"] when it stopped short of the known last page.
+        if self.scraper.search_mode == "local_first":
+            local = await asyncio.to_thread(self.db.search_local, query, max(want or 0, 20))
+            if local:
+                for result in local:
+                    yield result
+                return
+
+        seen = set()
+        first, last = [], None
+        async for kind, value in self._page_events(query, 1):
+            if kind == "done":
+                last = value[1]
+                continue
+            first.append(value)
+            if value["url"] not in seen:
+                seen.add(value["url"])
+                yield value
+
+        budget = self.search_pages if want is None else self.search_max_pages
+        if want is None and skip and first:
+            # Paging on without a limit: the default number of pages past the skipped results.
+            want = skip + len(first) * self.search_pages
+            budget = self.search_max_pages
+        page = 1
+        while first and page < min(budget, last or budget) and (want is None or len(seen) < want):
+            end = min(budget, last or budget)
+            if want is not None:
+                end = min(end, page + math.ceil((want - len(seen)) / len(first)))
+            # Later pages are fetched together but handed out in page order.
+            tasks = [asyncio.ensure_future(self._search_page(query, n)) for n in range(page + 1, end + 1)]
+            try:
+                for task in tasks:
+                    try:
+                        results, page_last = await task
+                    except (BudgetExceeded, DeadlineExceeded):
+                        # Deeper pages are best effort; answer with what we have.
+                        return
+                    page += 1
+                    last = page_last or last
+                    if not results:
+                        return
+                    for result in dedupe_results(results, seen):
+                        yield result
+            finally:
+                for task in tasks:
+                    _discard(task)
+        if walk is not None and first and last and page < min(last, self.search_max_pages):
+            walk["more"] = True
+
+    async def _page_events(self, query, page):
+        # ("result", result) per card of one result page, then ("done", (results, last_page)).
+        # Cached pages are replayed; otherwise the (possibly shared) scrape is followed.
+        key = self._search_key(query, page)
+        cached = await asyncio.to_thread(self.db.get_search, query, page)
+        if cached:
+            results, stale, last = cached
+            if stale:
+                self._spawn(self.flight.do(key, lambda: self._scrape_search(query, page)))
+            for result in results:
+                yield "result", result
+            yield "done", (results, last)
+            return
+
+        sent = 0
+        async for kind, value in self._follow(key, lambda: self._scrape_search(query, page)):
+            if kind == "result":
+                sent += 1
+                yield kind, value
+                continue
+            # The cards seen so far are a prefix of the page (_follow replays those
+            # published before this caller joined); this only fills in the rest when
+            # it joined a scrape that had already finished.
+            for result in value[0][sent:]:
+                yield "result", result
+            yield "done", value
+
+    async def _search_page(self, query, page):
+        async for kind, value in self._page_events(query, page):
+            if kind == "done":
+                return value
+
+    def prefetch(self, results):
+        # Warm the details of the results a user is most likely to open next. The scrape
+        # runs under the same single-flight key as /details, so a click that lands while
+        # it is still running joins it instead of starting over.
+        top = [r for r in results[:self.prefetch_top_n] if r.get("url")]
+        if top:
+            cutoff = asyncio.get_running_loop().time() + self.prefetch_budget
+            for result in top:
+                self._spawn(self._prefetch_one(result["url"], result.get("title"), cutoff))
+
+    async def _prefetch_one(self, url, title, cutoff):
+        async with self._prefetch_limit:
+            if asyncio.get_running_loop().time() > cutoff:
+                self.prefetch_stats["skipped"] += 1
+                return
+            if await asyncio.to_thread(self.db.peek, url):
+                self.prefetch_stats["cached"] += 1
+                return
+            if await asyncio.to_thread(self.db.get_negative, url):
+                self.prefetch_stats["negative"] += 1
+                return
+            self.prefetch_stats["started"] += 1
+            try:
+                await self.flight.do(("details", url), lambda: self._scrape_details(url, title))
+            except Exception as e:
+                log.debug(f"Prefetch failed for {url}: {e}")
+
+    async def _scrape_search(self, query, page=1):
+        key = self._search_key(query, page)
+        results, last = [], None
+        with self._publishing(key):
+            async for kind, value in self.scraper.iter_search(query, page):
+                if kind == "last_page":
+                    last = value
+                    continue
+                results.append(value)
+                self._publish(key, "result", value)
+                # Let followers flush each card before the next one is parsed.
+                await asyncio.sleep(0)
+            # An empty page past the known end is cached too, so paging stops there next time.
+            if results or (last is not None and last < page):
+                try:
+                    await asyncio.to_thread(self.db.save_search, query, results, page, last)
+                except Exception as e:
+                    log.warning(f"Search cache write failed for '{query}': {e}")
+            return results, last
+
+    def stats(self):
+        return {
+            "cache": {
+                "hits": self.db.stats["hits"],
+                "stale_hits": self.db.stats["stale_hits"],
+                "misses": self.db.stats["misses"],
+                "hit_ratio": self.db.hit_ratio(),
+                "tiers": self.db.tier_stats(),
+            },
+            "search_cache": {
+                "hits": self.db.stats["search_hits"],
+                "stale": self.db.stats["search_stale"],
+                "misses": self.db.stats["search_misses"],
+            },
+            "negative_cache": {
+                "hits": self.db.stats["negative_hits"],
+                "saves": self.db.stats["negative_saves"],
+            },
+            "local_search": {
+                "hits": self.db.stats["local_search_hits"],
+                "misses": self.db.stats["local_search_misses"],
+            },
+            "proxies": self.scraper.proxy_pool.snapshot(),
+            "sessions": self.scraper.sessions.snapshot(),
+            "parse_pool": self.scraper.parse_pool.snapshot() if self.scraper.parse_pool is not None else None,
+            "prefetch": dict(self.prefetch_stats),
+            "refresh": dict(self.refresher.stats, pending=len(self.refresher)) if self.refresher is not None else None,
+            "upstream": self._upstream_stats(),
+            "page_store": dict(self.scraper.pages.stats) if self.scraper.pages is not None else None,
+            "logging": log_stats(),
+            "coalesced": self.flight.coalesced,
+            "inflight": self.flight.inflight,
+        }
+
+    def _upstream_stats(self):
+        latency = self.scraper.latency
+        return {
+            "samples": len(latency),
+            "p50": latency.quantile(0.5),
+            "p90": latency.quantile(0.9),
+            "p99": latency.quantile(0.99),
+            "attempt_timeout": self.scraper.adaptive_timeout(),
+            "hedge_delay": self.scraper.hedge_delay(),
+        }
+
+    def collect_metrics(self):
+        stats = self.db.stats
+        yield "ps_cache_lookups_total", "counter", "Game cache lookups by result.", [
+            ({"result": "hit"}, stats["hits"]),
+            ({"result": "miss"}, stats["misses"]),
+        ]
+        yield "ps_search_cache_lookups_total", "counter", "Search cache lookups by result.", [
+            ({"result": "hit"}, stats["search_hits"]),
+            ({"result": "stale"}, stats["search_stale"]),
+            ({"result": "miss"}, stats["search_misses"]),
+        ]
+        yield "ps_local_search_total", "counter", "Local index searches by result.", [
+            ({"result": "hit"}, stats["local_search_hits"]),
+            ({"result": "miss"}, stats["local_search_misses"]),
+        ]
+        yield "ps_cache_stale_hits_total", "counter", "Cache hits served past the soft TTL.", [
+            ({}, stats["stale_hits"]),
+        ]
+        yield "ps_negative_cache_total", "counter", "Negative cache lookups that short-circuited a scrape, and failures recorded.", [
+            ({"result": "hit"}, stats["negative_hits"]),
+            ({"result": "save"}, stats["negative_saves"]),
+        ]
+        if self.refresher is not None:
+            yield "ps_refresh_total", "counter", "Background refreshes by outcome.", [
+                ({"result": "refreshed"}, self.refresher.stats["refreshed"]),
+                ({"result": "failed"}, self.refresher.stats["failed"]),
+                ({"result": "dropped"}, self.refresher.stats["dropped"]),
+            ]
+            yield "ps_refresh_pending", "gauge", "Stale entries waiting for a background refresh.", [
+                ({}, len(self.refresher)),
+            ]
+        if self.db.local is not None:
+            yield "ps_local_cache_lookups_total", "counter", "In-process cache tier lookups by result.", [
+                ({"result": "hit"}, self.db.local.hits),
+                ({"result": "miss"}, self.db.local.misses),
+            ]
+
+        proxies = self.scraper.proxy_pool.snapshot()
+        yield "ps_proxy_requests_total", "counter", "Requests per proxy by outcome.", [
+            sample
+            for p in proxies
+            for sample in (
+                ({"proxy": proxy_label(p["url"]), "result": "success"}, p["successes"]),
+                ({"proxy": proxy_label(p["url"]), "result": "failure"}, p["failures"]),
+            )
+        ]
+        yield "ps_proxy_latency_seconds", "gauge", "EWMA request latency per proxy.", [
+            ({"proxy": proxy_label(p["url"])}, p["latency"]) for p in proxies if p["latency"] is not None
+        ]
+        yield "ps_proxy_cooling", "gauge", "1 while a proxy is in cool-down.", [
+            ({"proxy": proxy_label(p["url"])}, int(p["cooling"])) for p in proxies
+        ]
+
+        sessions = self.scraper.sessions.snapshot()
+        yield "ps_upstream_requests_total", "counter", "Upstream requests sent through pooled sessions.", [
+            ({}, sessions["requests"]),
+        ]
+        yield "ps_upstream_handshakes_total", "counter", "New upstream connections opened (TCP/TLS or proxy CONNECT).", [
+            ({}, sessions["handshakes"]),
+        ]
+        yield "ps_session_routes", "gauge", "Egress routes with a live pooled session.", [
+            ({}, len(sessions["routes"])),
+        ]
+
+        pool = self.scraper.parse_pool
+        if pool is not None:
+            yield "ps_parse_pool_pending", "gauge", "Parse jobs queued or running in worker processes.", [
+                ({}, pool.pending),
+            ]
+            yield "ps_parse_pool_waits_total", "counter", "Parse jobs that waited for a free queue slot.", [
+                ({}, pool.stats["waited"]),
+            ]
+
+        upstream = self._upstream_stats()
+        yield "ps_upstream_latency_seconds", "gauge", "Upstream response time over the recent window, by quantile.", [
+            ({"quantile": q}, upstream[f"p{int(q * 100)}"]) for q in (0.5, 0.9, 0.99) if upstream["samples"]
+        ]
+        yield "ps_upstream_attempt_timeout_seconds", "gauge", "Current adaptive per-attempt upstream timeout.", [
+            ({}, upstream["attempt_timeout"]),
+        ]
+
+        pages = self.scraper.pages
+        if pages is not None:
+            yield "ps_page_fetches_total", "counter", "Game, DL and search page fetches by what came back compared to the stored copy.", [
+                ({"result": result}, pages.stats[result]) for result in ("new", "changed", "not_modified", "same_body")
+            ]
+            yield "ps_page_parses_total", "counter", "Page parses run, and skipped because the page and its input were unchanged.", [
+                ({"result": "parsed"}, pages.stats["parsed"]),
+                ({"result": "reused"}, pages.stats["reused"]),
+            ]
+
+        logging_stats = log_stats()
+        yield "ps_log_records_dropped_total", "counter", "Log records not written: repeats over the rate limit, or a full queue.", [
+            ({"reason": "suppressed"}, logging_stats["suppressed"]),
+            ({"reason": "queue_full"}, logging_stats["dropped"]),
+        ]
+        yield "ps_log_queue_depth", "gauge", "Log records waiting for the background writer.", [
+            ({}, logging_stats["queued"]),
+        ]
+
+        yield "ps_coalesced_requests_total", "counter", "Requests that joined an in-flight scrape.", [
+            ({}, self.flight.coalesced),
+        ]
+        yield "ps_inflight_scrapes", "gauge", "Scrapes currently in flight.", [
+            ({}, self.flight.inflight),
+        ]
@@ -0,0 +1,116 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from src.metrics import proxy_label
+
+DEFAULT_IDLE_TIMEOUT = 60
+DIRECT = "direct"
+MAX_TRACKED_PORTS = 1024
+
+class Route:
+    def __init__(self, session):
+        self.session = session
+        self.last_used = time.monotonic()
+        self.inflight = 0
+        self.requests = 0
+        self.handshakes = 0
+        self.ports = set()
+
+    def snapshot(self, route):
+        return {
+            "route": route,
+            "requests": self.requests,
+            "handshakes": self.handshakes,
+            "reuse_ratio": round(1 - self.handshakes / self.requests, 4) if self.requests else 0.0,
+            "idle": round(time.monotonic() - self.last_used, 1),
+            "inflight": self.inflight,
+        }
+
+
+class SessionPool:
+    """One long-lived session per egress route (direct or a specific proxy).
+
+    curl keeps connections alive inside a session, so requests on the same route reuse
+    TCP/TLS (and HTTP/2 when the peer negotiates it) instead of handshaking again.
+    Routes unused for ``idle_timeout`` are evicted and their sessions handed back to
+    the caller to close.
+    """
+
+    def __init__(self, factory, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.evicted = 0
+        self.requests = 0
+        self.handshakes = 0
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + idle_timeout / 4
+
+    @contextmanager
+    def use(self, proxy_url):
+        key = proxy_url or DIRECT
+        with self._lock:
+            route = self._routes.get(key)
+            if route is None:
+                route = self._routes[key] = Route(self.factory(proxy_url))
+            route.inflight += 1
+            route.last_used = time.monotonic()
+        try:
+            yield route.session
+        finally:
+            with self._lock:
+                route.inflight -= 1
+                route.last_used = time.monotonic()
+
+    def record(self, proxy_url, resp):
+        # A local port not seen on this route means curl opened a new connection,
+        # i.e. paid a TCP/TLS (or proxy CONNECT) handshake for this request.
+        port = getattr(resp, "local_port", None)
+        with self._lock:
+            route = self._routes.get(proxy_url or DIRECT)
+            if route is None:
+                return
+            route.requests += 1
+            self.requests += 1
+            if port and port not in route.ports:
+                route.handshakes += 1
+                self.handshakes += 1
+                if len(route.ports) >= MAX_TRACKED_PORTS:
+                    route.ports.clear()
+                route.ports.add(port)
+
+    def warm(self):
+        with self._lock:
+            return {key for key, route in self._routes.items() if route.requests and key != DIRECT}
+
+    def evict_idle(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_sweep:
+            return []
+        with self._lock:
+            self._next_sweep = now + self.idle_timeout / 4
+            idle = [
+                key for key, route in self._routes.items()
+                if not route.inflight and now - route.last_used > self.idle_timeout
+            ]
+            sessions = [self._routes.pop(key).session for key in idle]
+            self.evicted += len(sessions)
+        return sessions
+
+    def close_all(self):
+        with self._lock:
+            sessions = [route.session for route in self._routes.values()]
+            self._routes.clear()
+        return sessions
+
+    def snapshot(self):
+        with self._lock:
+            # Served on /stats: proxy routes are reported as host:port, without credentials.
+            routes = [route.snapshot(key if key == DIRECT else proxy_label(key)) for key, route in self._routes.items()]
+        return {
+            "routes": routes,
+            "requests": self.requests,
+            "handshakes": self.handshakes,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,303 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.codec import EntryCodec
+
+class JSONStorage:
+    """Legacy backend: the whole cache lives in one JSON file rewritten on every put."""
+
+    name = "json"
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        # Loads on first use, so a put() racing a background load() cannot rewrite
+        # the file from an empty dict.
+        if self._data is None:
+            self.load()
+        return self._data
+
+    def load(self):
+        with self._lock:
+            if self._data is not None:
+                return
+            data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    data = {}
+            self._data = data
+
+    def get(self, key):
+        return self._db().get(key)
+
+    def _save(self):
+        try:
+            dirpath = os.path.dirname(self.path)
+            if dirpath:
+                os.makedirs(dirpath, exist_ok=True)
+
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=4)
+        except OSError as e:
+            print(f"[ERROR] Failed to save cache: {e}")
+
+    def put(self, key, entry, ttl):
+        with self._lock:
+            self._db()[key] = entry
+            self._save()
+
+    def delete(self, key):
+        with self._lock:
+            # Nothing to rewrite if the key was not there.
+            if self._db().pop(key, None) is not None:
+                self._save()
+
+    def count(self):
+        return len(self._db())
+
+    def items(self):
+        with self._lock:
+            return list(self._db().items())
+
+
+class SQLiteStorage:
+    """Keyed SQLite file in WAL mode: O(1) writes, crash-safe, rows read on demand."""
+
+    name = "sqlite"
+
+    def __init__(self, path, ttl, legacy_json=None, codec=None):
+        self.path = path
+        self.ttl = ttl
+        self.legacy_json = legacy_json
+        self.codec = codec or EntryCodec()
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        if self._conn is None:
+            self.load()
+        return self._conn
+
+    def load(self):
+        with self._lock:
+            if self._conn is None:
+                self._open()
+
+    def _open(self):
+        dirpath = os.path.dirname(self.path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        # Published only once the table exists, so _db() callers never see half a setup.
+        self._conn = conn
+        self.purge_expired()
+        self._migrate_legacy()
+
+    def _migrate_legacy(self):
+        if not self.legacy_json or not os.path.exists(self.legacy_json):
+            return
+
+        legacy = JSONStorage(self.legacy_json)
+        legacy.load()
+        if not legacy._data:
+            return
+
+        now = time.time()
+        rows = [
+            (key, self.codec.dumps(entry), entry.get("timestamp", now) + self.ttl)
+            for key, entry in legacy._data.items()
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)", rows
+            )
+            self._conn.execute("COMMIT")
+
+        os.replace(self.legacy_json, self.legacy_json + ".migrated")
+        print(f"[INFO] Migrated {len(rows)} entries from {self.legacy_json} to {self.path}")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row or row[1] < time.time():
+            return None
+        return self.codec.loads(row[0])
+
+    def put(self, key, entry, ttl):
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, self.codec.dumps(entry), time.time() + (ttl or self.ttl)),
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._db().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def items(self):
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT key, value FROM cache WHERE expires >= ?", (time.time(),)
+            ).fetchall()
+        for key, value in rows:
+            yield key, self.codec.loads(value)
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+INVALIDATION_CHANNEL = "ps_cache:invalidate"
+DEFAULT_KEY_PREFIX = "ps_cache:"
+# Unprefixed keys written before entries were namespaced: game URLs, search: and neg:.
+LEGACY_KEY_PATTERNS = ("http*", "search:*", "neg:*")
+MIGRATED_MARKER = "migrated"
+
+class RedisStorage:
+    """Entries live under ``prefix`` so scans never touch other keys in the same
+    database (the shared upstream budget, other apps)."""
+
+    name = "redis"
+
+    def __init__(self, client=None, raw_client=None, codec=None, prefix=DEFAULT_KEY_PREFIX, url=None):
+        # ``client`` decodes responses (keys, pub/sub); values go through ``raw_client``
+        # because binary entries are not valid UTF-8. With ``url`` both are created on
+        # first use instead.
+        self.url = url
+        self._client = client
+        self._raw = raw_client or client
+        self._lock = threading.Lock()
+        self.codec = codec or EntryCodec()
+        if url is None and self._raw is client and self.codec.binary:
+            self.codec = EntryCodec("json")
+        self.prefix = prefix
+        self._pubsub_thread = None
+
+    def _connect(self):
+        with self._lock:
+            if self._client is None:
+                import redis
+                client = redis.from_url(self.url, decode_responses=True)
+                raw = redis.from_url(self.url)
+                client.ping()
+                print("[INFO] Connected to Redis Cloud Database")
+                self._client, self._raw = client, raw
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            self._connect()
+        return self._raw
+
+    def load(self):
+        if self.prefix:
+            self._migrate_legacy()
+
+    def _migrate_legacy(self):
+        marker = self.prefix + MIGRATED_MARKER
+        if self.client.exists(marker):
+            return
+        moved = 0
+        for pattern in LEGACY_KEY_PATTERNS:
+            for key in self.client.scan_iter(match=pattern, count=500):
+                if self.client.type(key) != "string":
+                    continue
+                # RENAMENX keeps an entry already written under the new name.
+                moved += bool(self.client.renamenx(key, self.prefix + key))
+        self.client.set(marker, "1")
+        if moved:
+            print(f"[INFO] Moved {moved} Redis cache entries under '{self.prefix}'")
+
+    def get(self, key):
+        data = self.raw.get(self.prefix + key)
+        if not data:
+            return None
+        return self.codec.loads(data)
+
+    def put(self, key, entry, ttl):
+        self.raw.setex(self.prefix + key, ttl, self.codec.dumps(entry))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def count(self):
+        return sum(1 for _ in self._keys())
+
+    def _keys(self):
+        for key in self.client.scan_iter(match=self.prefix + "*", count=500):
+            key = key[len(self.prefix):]
+            if key != MIGRATED_MARKER:
+                yield key
+
+    def items(self):
+        for key in self._keys():
+            try:
+                value = self.raw.get(self.prefix + key)
+                if value:
+                    yield key, self.codec.loads(value)
+            except Exception as e:
+                print(f"[ERROR] Skipping unreadable cache entry {key}: {e}")
+
+    def publish_invalidation(self, key, sender):
+        self.client.publish(INVALIDATION_CHANNEL, f"{sender}|{key}")
+
+    def subscribe_invalidations(self, callback, sender, mode="pubsub"):
+        if self._pubsub_thread is not None:
+            return
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        if mode == "keyspace":
+            # Needs notify-keyspace-events to include K and g/$/x on the server.
+            db = self.client.connection_pool.connection_kwargs.get("db", 0)
+            prefix = f"__keyspace@{db}__:"
+
+            prefix += self.prefix
+
+            def on_keyspace(message):
+                callback(message["channel"][len(prefix):])
+
+            pubsub.psubscribe(**{f"{prefix}*": on_keyspace})
+        else:
+            def on_message(message):
+                origin, _, key = message["data"].partition("|")
+                if origin != sender:
+                    callback(key)
+
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: on_message})
+
+        self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
@@ -30,6 +30,52 @@ function render(templateName, data) {
     return html;
 }
 
+// Reads an NDJSON response line by line, calling onEvent for each parsed object.
+async function streamEvents(url, onEvent) {
+    const res = await fetch(url);
+    if(!res.ok) throw new Error(`Fetch failed (${res.status})`);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        for (const line of lines) {
+            if (!line.trim()) continue;
+            const event = JSON.parse(line);
+            if (event.type === 'error') throw new Error(event.detail);
+            onEvent(event);
+        }
+        if (done) break;
+    }
+}
+
+function createResultCard(game) {
+    const card = document.createElement('div');
+    card.className = "block border border-border bg-offblack p-6 hover:border-white transition group relative overflow-hidden cursor-pointer";
+
+    const templateData = {
+        title: game.title,
+        bg_image: game.image ? `url('${game.image}')` : 'none',
+        size: game.size || 'Unknown',
+        region: game.region || 'Global',
+        cusa: game.cusa || 'N/A'
+    };
+
+    card.innerHTML = render('card_result', templateData);
+
+    card.addEventListener('click', (ev) => {
+        if (!card.dataset.original) {
+            ev.preventDefault();
+            fetchDetails(game.url, card);
+        }
+    });
+    return card;
+}
+
 form.addEventListener('submit', async (e) => {
     e.preventDefault();
     const query = input.value.trim();
@@ -39,45 +85,27 @@ form.addEventListener('submit', async (e) => {
     loader.classList.remove('hidden');
     resultsGrid.innerHTML = '';
 
-    try {
-        const res = await fetch(`/search?q=${encodeURIComponent(query)}`);
-        const data = await res.json();
-        
+    let count = 0;
+    const showResults = () => {
         loader.classList.add('hidden');
         resultsSection.classList.remove('hidden');
-        
-        const games = data.results || [];
-        countLabel.innerText = `${games.length} OBJECTS FOUND`;
+        countLabel.innerText = `${count} OBJECTS FOUND`;
+    };
 
-        if(games.length === 0) {
+    try {
+        // Cards are appended as the server parses them instead of after the whole page.
+        await streamEvents(`/search?q=${encodeURIComponent(query)}&stream=true`, (event) => {
+            if (event.type !== 'result') return;
+            count += 1;
+            resultsGrid.appendChild(createResultCard(event.result));
+            showResults();
+        });
+
+        showResults();
+        if(count === 0) {
             resultsGrid.innerHTML = `<div class="col-span-2 text-center text-dim border border-border p-8">No Data</div>`;
-            return;
         }
 
-        games.forEach(game => {
-            const card = document.createElement('div');
-            card.className = "block border border-border bg-offblack p-6 hover:border-white transition group relative overflow-hidden cursor-pointer";
-            
-            const templateData = {
-                title: game.title,
-                bg_image: game.image ? `url('${game.image}')` : 'none',
-                size: game.size || 'Unknown',
-                region: game.region || 'Global',
-                cusa: game.cusa || 'N/A'
-            };
-
-            card.innerHTML = render('card_result', templateData);
-
-            card.addEventListener('click', (ev) => {
-                if (!card.dataset.original) {
-                    ev.preventDefault();
-                    fetchDetails(game.url, card);
-                }
-            });
-
-            resultsGrid.appendChild(card);
-        });
-
     } catch (err) {
         console.error(err);
         loader.classList.add('hidden');
@@ -86,47 +114,58 @@ form.addEventListener('submit', async (e) => {
     }
 });
 
+function renderLinks(links) {
+    return links.map(linkItem => {
+        const isObj = typeof linkItem !== 'string';
+        return render('link_item', {
+            url: isObj ? linkItem.url : linkItem,
+            label: isObj ? (linkItem.label || 'Link') : 'Download',
+            group: isObj ? (linkItem.group || 'Misc') : 'Mirror'
+        });
+    }).join('');
+}
+
 async function fetchDetails(url, cardElement) {
     const originalText = cardElement.innerHTML;
     cardElement.dataset.original = originalText;
     
     cardElement.innerHTML = `<div class="h-32 flex items-center justify-center text-dim animate-blink">Meow...</div>`;
-    
-    try {
-        const res = await fetch(`/details?url=${encodeURIComponent(url)}`);
-        if(!res.ok) throw new Error("Fetch failed");
-        const data = await res.json();
-        
-        let linksHtml = '';
-        if(data.links && Array.isArray(data.links)) {
-            data.links.forEach(linkItem => {
-                const isObj = typeof linkItem !== 'string';
-                const linkData = {
-                    url: isObj ? linkItem.url : linkItem,
-                    label: isObj ? (linkItem.label || 'Link') : 'Download',
-                    group: isObj ? (linkItem.group || 'Misc') : 'Mirror'
-                };
-                
-                linksHtml += render('link_item', linkData);
-            });
-        }
 
-        const detailsData = {
-            firmware: data.metadata.firmware || 'N/A',
-            password: data.metadata.password || 'N/A',
-            links_list: linksHtml || '<li class="text-dim text-xs">No links found</li>'
-        };
+    let metadata = null;
+    let linksHtml = '';
+    let done = false;
+    const show = () => {
+        if (!metadata || !cardElement.dataset.original) return;
+        const pending = '<li class="text-dim text-xs animate-blink">Resolving links...</li>';
+        cardElement.innerHTML = render('card_details', {
+            firmware: metadata.firmware || 'N/A',
+            password: metadata.password || 'N/A',
+            links_list: linksHtml || (done ? '<li class="text-dim text-xs">No links found</li>' : pending)
+        });
+    };
 
-        cardElement.classList.remove('hover:border-white');
-        cardElement.classList.add('border-dim');
-        
-        cardElement.innerHTML = render('card_details', detailsData);
-        
-        cardElement.dataset.original = originalText;
+    try {
+        // Metadata arrives once the game page is parsed; link groups follow from the DL page.
+        await streamEvents(`/details?url=${encodeURIComponent(url)}&stream=true`, (event) => {
+            if (event.type === 'metadata') {
+                metadata = event.metadata;
+                cardElement.classList.remove('hover:border-white');
+                cardElement.classList.add('border-dim');
+            } else if (event.type === 'links') {
+                linksHtml += renderLinks(event.links);
+            } else if (event.type === 'done') {
+                done = true;
+            }
+            show();
+        });
+        done = true;
+        show();
 
     } catch (err) {
         alert("Failed to load details.");
         cardElement.innerHTML = originalText;
+        cardElement.classList.add('hover:border-white');
+        cardElement.classList.remove('border-dim');
         delete cardElement.dataset.original;
     }
 }